@@ -0,0 +1,217 @@
+# backtest.py
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+import const as c
+from feature_matrix import FeatureMatrix
+from generate_goals_against_model import train_goals_against_model
+from generate_player_goals_model import train_hierarchical_model, train_player_models
+from lineup_optimizer import outcome_probabilities
+from model_registry import ModelRegistry
+from teams import Team, add_team_argument, get_team
+from utils import DataLoader
+
+BASELINE_FILE = 'backtest_baseline.json'
+MIN_TRAINING_MATCHES = 10
+CALIBRATION_BINS = 5
+OUTCOMES = ['Win', 'Draw', 'Loss']
+# Accuracy metrics that fail --compare when they grow by more than this over the baseline
+REGRESSION_TOLERANCE = {'log_loss': 0.02, 'mae_goals_for': 0.05, 'mae_goals_against': 0.05}
+
+
+def baseline_path(team=None):
+    return get_team(team).models_path / BASELINE_FILE
+
+
+def _scratch_team(team, models_path):
+    # Same team, but its models are trained into a throwaway folder
+    scratch = Team(team.slug, team.name, team.goalkeepers, team.default)
+    scratch.models_path = Path(models_path)
+    return scratch
+
+
+def _train(features, model, team):
+    # The trainers report every fit; a backtest only wants the timings
+    with contextlib.redirect_stdout(io.StringIO()):
+        if model == 'hierarchical':
+            train_hierarchical_model(features, team=team)
+        else:
+            train_player_models(workers=1, features=features, team=team)
+        train_goals_against_model(features, team=team)
+
+
+def walk_forward(results_df, players_df, events_df, model=c.PLAYER_GOALS_MODEL, min_train=MIN_TRAINING_MATCHES, team=None):
+    """Replay history: train on every match before each one, then predict it.
+
+    Models are trained into one scratch folder for the whole run, so each step
+    goes through the trainers' fingerprint cache like a real retrain after a
+    new gameweek. Returns one dict per predicted match.
+    """
+    team = get_team(team)
+    results_df = results_df.sort_values('Gameweek', kind='stable').reset_index(drop=True)
+    appeared = events_df[events_df['appeared'] == 1].merge(players_df, on='player_id')
+    lineups = appeared.groupby('gameweek_id')['Player'].apply(list)
+
+    steps = []
+    with tempfile.TemporaryDirectory() as models_path:
+        scratch = _scratch_team(team, models_path)
+
+        for t in range(min_train, len(results_df)):
+            match = results_df.iloc[t]
+            if match['Gameweek'] not in lineups.index:
+                continue  # No lineup recorded to predict from
+
+            start = time.perf_counter()
+            history = results_df.iloc[:t]
+            features = FeatureMatrix(history, players_df, events_df[events_df['gameweek_id'].isin(history['Gameweek'])])
+            _train(features, model, scratch)
+            train_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            stacked = ModelRegistry.from_model_files(scratch.models_path).stacked()
+            load_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            # Scored as the Match Forecaster scores it: player models on the outfield teammates only
+            lineup = lineups[match['Gameweek']]
+            goalkeepers = [player for player in lineup if player in team.goalkeepers]
+            outfield_players = [player for player in lineup if player not in team.goalkeepers]
+            expected_goals, goals_against = stacked.predict_lineup(outfield_players, goalkeepers, match['opponent_form'])
+            goals_for = sum(expected_goals.values())
+            win, draw, loss = (float(p[0]) for p in outcome_probabilities([goals_for], [goals_against]))
+            predict_time = time.perf_counter() - start
+
+            steps.append({
+                'Gameweek': int(match['Gameweek']),
+                'Result': match['Result'],
+                'goals_for': int(match['Score home']),
+                'goals_against': int(match['Score away']),
+                'expected_goals_for': float(goals_for),
+                'expected_goals_against': float(goals_against),
+                'probabilities': dict(zip(OUTCOMES, [win, draw, loss])),
+                'missing_models': sum(player not in stacked.row for player in lineup),
+                'train_s': train_time,
+                'load_s': load_time,
+                'predict_s': predict_time,
+            })
+
+    return steps
+
+
+def calibration(steps, bins=CALIBRATION_BINS):
+    """Reliability table over every (match, outcome) probability, one-vs-rest."""
+    predicted = np.array([step['probabilities'][outcome] for step in steps for outcome in OUTCOMES])
+    observed = np.array([step['Result'] == outcome for step in steps for outcome in OUTCOMES], dtype=float)
+    bin_ids = np.minimum((predicted * bins).astype(int), bins - 1)
+
+    table = []
+    for b in range(bins):
+        in_bin = bin_ids == b
+        if in_bin.any():
+            table.append({
+                'bin': f"{b / bins:.1f}-{(b + 1) / bins:.1f}",
+                'count': int(in_bin.sum()),
+                'predicted': float(predicted[in_bin].mean()),
+                'observed': float(observed[in_bin].mean()),
+            })
+    error = sum(row['count'] * abs(row['predicted'] - row['observed']) for row in table) / max(len(predicted), 1)
+    return table, float(error)
+
+
+def summarise(steps):
+    actual = np.array([step['probabilities'].get(step['Result'], 0.0) for step in steps])
+    table, calibration_error = calibration(steps)
+    train_times = np.array([step['train_s'] for step in steps])
+    predict_times = np.array([step['load_s'] + step['predict_s'] for step in steps])
+
+    return {
+        'matches': len(steps),
+        'log_loss': float(np.mean(-np.log(np.clip(actual, 1e-15, 1)))),
+        'mae_goals_for': float(np.mean([abs(step['expected_goals_for'] - step['goals_for']) for step in steps])),
+        'mae_goals_against': float(np.mean([abs(step['expected_goals_against'] - step['goals_against']) for step in steps])),
+        'calibration_error': calibration_error,
+        'calibration': table,
+        'missing_models': int(sum(step['missing_models'] for step in steps)),
+        'train_s_mean': float(train_times.mean()),
+        'train_s_total': float(train_times.sum()),
+        'inference_s_mean': float(predict_times.mean()),
+        'inference_s_p95': float(np.percentile(predict_times, 95)),
+    }
+
+
+def print_summary(summary):
+    print(f"Matches predicted:        {summary['matches']}")
+    print(f"Log-loss (W/D/L):         {summary['log_loss']:.4f}")
+    print(f"MAE goals for:            {summary['mae_goals_for']:.3f}")
+    print(f"MAE goals against:        {summary['mae_goals_against']:.3f}")
+    print(f"Calibration error:        {summary['calibration_error']:.4f}")
+    print(f"Players without a model:  {summary['missing_models']}")
+    print(f"Training per step:        {summary['train_s_mean'] * 1000:.1f} ms (total {summary['train_s_total']:.2f}s)")
+    print(f"Inference per step:       {summary['inference_s_mean'] * 1000:.1f} ms (p95 {summary['inference_s_p95'] * 1000:.1f} ms)")
+    print("Calibration (predicted vs observed):")
+    for row in summary['calibration']:
+        print(f"  {row['bin']}: {row['predicted']:.2f} vs {row['observed']:.2f} ({row['count']})")
+
+
+def compare(summary, baseline):
+    """Print the change from the baseline; False when an accuracy metric regressed."""
+    regressions = []
+    print(f"{'Metric':<20} {'Baseline':>10} {'Current':>10} {'Change':>10}")
+    for key in ['log_loss', 'mae_goals_for', 'mae_goals_against', 'calibration_error',
+                'train_s_mean', 'inference_s_mean', 'inference_s_p95']:
+        change = summary[key] - baseline[key]
+        print(f"{key:<20} {baseline[key]:>10.4f} {summary[key]:>10.4f} {change:>+10.4f}")
+        if change > REGRESSION_TOLERANCE.get(key, float('inf')):
+            regressions.append(key)
+
+    if regressions:
+        print(f"❌ Worse than the baseline: {', '.join(regressions)}")
+        return False
+    print("✅ No accuracy regressions against the baseline")
+    return True
+
+
+def run_backtest(model=c.PLAYER_GOALS_MODEL, min_train=MIN_TRAINING_MATCHES, team=None):
+    loader = DataLoader(team)
+    steps = walk_forward(loader.results_data(), loader.players_data(), loader.match_events(), model, min_train, loader.team)
+    summary = {'model': model, 'min_train': min_train, **summarise(steps)}
+    return summary, steps
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the match forecaster.")
+    parser.add_argument('--model', choices=['hierarchical', 'independent'], default=c.PLAYER_GOALS_MODEL,
+                        help="Player goal model to backtest.")
+    parser.add_argument('--min-train', type=int, default=MIN_TRAINING_MATCHES,
+                        help="Matches of history before the first prediction.")
+    parser.add_argument('--save-baseline', action='store_true', help=f"Store the summary as the team's {BASELINE_FILE}.")
+    parser.add_argument('--compare', action='store_true', help="Compare against the stored baseline.")
+    parser.add_argument('--output', type=Path, default=None, help="Write every step and the summary as JSON.")
+    add_team_argument(parser)
+    args = parser.parse_args()
+
+    summary, steps = run_backtest(args.model, args.min_train, args.team)
+    print_summary(summary)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'summary': summary, 'steps': steps}, f, indent=2)
+
+    if args.save_baseline:
+        with open(baseline_path(args.team), 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"✅ Baseline saved to {baseline_path(args.team)}")
+
+    if args.compare:
+        with open(baseline_path(args.team), 'r') as f:
+            baseline = json.load(f)
+        if baseline.get('model') != summary['model'] or baseline.get('min_train') != summary['min_train']:
+            print(f"⚠️ Baseline was run with model={baseline.get('model')}, min_train={baseline.get('min_train')}")
+        sys.exit(0 if compare(summary, baseline) else 1)
@@ -0,0 +1,305 @@
+# build.py
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+import pandas as pd
+import const as c
+from feature_matrix import FeatureMatrix
+from form_analytics import compute_form
+from generate_form_data import write_form
+from generate_goals_against_model import goals_against_model_path, train_goals_against_model
+from generate_homepage_data import write_homepage_data
+from generate_player_goals_model import player_model_path, train_hierarchical_model, train_player_models
+from generate_player_stats_data import compute_player_stats, write_player_stats
+from generate_synergy_data import synergy_matrix, write_synergy
+from generate_team_stats_data import season_stats_file, write_team_stats
+from generate_thumbnails import generate_thumbnails, thumbnail_path
+from match_events import with_names
+from model_registry import SERVING_FILE, build_bundle, bundle_path
+from teams import add_team_argument, get_team
+from utils import DataLoader
+
+APP_DIR = Path(__file__).parent
+FINGERPRINTS_FILE = 'build_fingerprints.json'
+
+
+class BuildContext:
+    """The dataset, loaded once and shared by every step of a build."""
+
+    def __init__(self, team=None, model=c.PLAYER_GOALS_MODEL, force=False):
+        loader = DataLoader(team)
+        self.team = loader.team
+        self.model = model
+        # Rebuild every step and refit the models past the trainers' own fingerprint cache
+        self.force = force
+        self.results = loader.results_data()
+        self.players = loader.players_data()
+        self.events = loader.match_events()
+        self._features = None
+        self._lock = threading.Lock()
+
+    def features(self):
+        # Built on first use, once for both trainers
+        with self._lock:
+            if self._features is None:
+                self._features = FeatureMatrix(self.results, self.players, self.events)
+            return self._features
+
+    def tables(self):
+        return [self.results, self.players, self.events]
+
+    def played(self):
+        played_ids = self.events.loc[self.events['appeared'] == 1, 'player_id'].unique()
+        return self.players.loc[self.players['player_id'].isin(played_ids), 'Player'].tolist()
+
+
+class BuildStep:
+    """One artifact of the build.
+
+    ``run(ctx)`` writes the files ``outputs(ctx)``. The step is skipped when
+    its fingerprint - the ``inputs(ctx)`` values, the ``sources`` files and the
+    fingerprints of the steps in ``deps`` - matches the last successful build
+    and every output exists.
+    """
+
+    def __init__(self, name, run, deps=(), inputs=None, sources=(), outputs=None):
+        self.name = name
+        self.run = run
+        self.deps = list(deps)
+        self.inputs = inputs or (lambda ctx: [])
+        self.sources = list(sources)
+        self.outputs = outputs or (lambda ctx: [])
+
+    def fingerprint(self, ctx, dep_fingerprints):
+        digest = hashlib.sha256(self.name.encode())
+        for value in self.inputs(ctx):
+            digest.update(_digest(value).encode())
+        for source in self.sources:
+            digest.update((APP_DIR / source).read_bytes())
+        for dep in self.deps:
+            digest.update(dep_fingerprints[dep].encode())
+        return digest.hexdigest()
+
+
+def _digest(value):
+    if isinstance(value, pd.DataFrame):
+        digest = hashlib.sha256(json.dumps(list(map(str, value.columns))).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _train_player_goals(ctx):
+    if ctx.model == 'hierarchical':
+        train_hierarchical_model(ctx.features(), force=ctx.force, team=ctx.team)
+    else:
+        # The build already runs steps side by side; fit in-process
+        train_player_models(workers=1, features=ctx.features(), force=ctx.force, team=ctx.team)
+
+
+def _image_signatures(ctx):
+    return [(path.name, path.stat().st_mtime_ns, path.stat().st_size) for path in sorted(ctx.team.images_path.glob('*.png'))]
+
+
+def _team_stats_paths(ctx):
+    seasons = [None] + sorted(ctx.results['Season'].unique().tolist())
+    return [ctx.team.team_stats_dir / season_stats_file(season) for season in seasons]
+
+
+def _thumbnail_paths(ctx):
+    return [thumbnail_path(path.stem, width, ctx.team)
+            for path in sorted(ctx.team.images_path.glob('*.png')) for width in c.THUMBNAIL_WIDTHS]
+
+
+MODEL_SOURCES = ['feature_matrix.py', 'training_cache.py']
+
+STEPS = [
+    BuildStep(
+        'player_goals_model', _train_player_goals,
+        inputs=lambda ctx: ctx.tables() + [ctx.model],
+        sources=MODEL_SOURCES + ['generate_player_goals_model.py', 'hierarchical_model.py', 'model_scorer.py'],
+        outputs=lambda ctx: [player_model_path(player, ctx.team) for player in ctx.played()],
+    ),
+    BuildStep(
+        'goals_against_model', lambda ctx: train_goals_against_model(ctx.features(), force=ctx.force, team=ctx.team),
+        inputs=BuildContext.tables,
+        sources=MODEL_SOURCES + ['generate_goals_against_model.py'],
+        outputs=lambda ctx: [goals_against_model_path(ctx.team)],
+    ),
+    BuildStep(
+        'model_bundle', lambda ctx: build_bundle(ctx.team),
+        deps=['player_goals_model', 'goals_against_model'],
+        sources=['model_registry.py', 'model_scorer.py'],
+        outputs=lambda ctx: [bundle_path(ctx.team), ctx.team.models_path / SERVING_FILE],
+    ),
+    BuildStep(
+        'homepage', lambda ctx: write_homepage_data(ctx.results, ctx.events, ctx.players, ctx.team),
+        inputs=BuildContext.tables,
+        sources=['generate_homepage_data.py'],
+        outputs=lambda ctx: [ctx.team.homepage_dir / name for name in
+                             ['result_counts.csv', 'goals_summary.csv', 'recent_results.csv', 'latest_match.csv']],
+    ),
+    BuildStep(
+        'player_stats', lambda ctx: write_player_stats(compute_player_stats(ctx.results, ctx.players, ctx.events), ctx.team),
+        inputs=BuildContext.tables,
+        sources=['generate_player_stats_data.py'],
+        outputs=lambda ctx: [ctx.team.player_stats_path],
+    ),
+    BuildStep(
+        'team_stats', lambda ctx: write_team_stats(ctx.results, ctx.events, ctx.players, team=ctx.team),
+        inputs=BuildContext.tables,
+        sources=['generate_team_stats_data.py'],
+        outputs=_team_stats_paths,
+    ),
+    BuildStep(
+        'form', lambda ctx: write_form(compute_form(ctx.results, with_names(ctx.events, ctx.players)), ctx.team),
+        inputs=BuildContext.tables,
+        sources=['generate_form_data.py', 'form_analytics.py'],
+        outputs=lambda ctx: [ctx.team.form_path],
+    ),
+    BuildStep(
+        'synergy', lambda ctx: write_synergy(synergy_matrix(ctx.results, ctx.events, ctx.players), ctx.team),
+        inputs=BuildContext.tables,
+        sources=['generate_synergy_data.py'],
+        outputs=lambda ctx: [ctx.team.synergy_path],
+    ),
+    BuildStep(
+        'thumbnails', lambda ctx: generate_thumbnails(team=ctx.team),
+        inputs=lambda ctx: [_image_signatures(ctx), list(c.THUMBNAIL_WIDTHS), c.THUMBNAIL_SCALE],
+        sources=['generate_thumbnails.py'],
+        outputs=_thumbnail_paths,
+    ),
+]
+
+
+def fingerprints_path(team=None):
+    return get_team(team).cache_path / FINGERPRINTS_FILE
+
+
+def _load_fingerprints(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_fingerprints(path, fingerprints):
+    os.makedirs(path.parent, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(fingerprints, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def check_graph(steps):
+    """Raise ValueError if a step depends on a step not in ``steps`` or the deps form a cycle."""
+    names = {step.name for step in steps}
+    for step in steps:
+        unknown = [dep for dep in step.deps if dep not in names]
+        if unknown:
+            raise ValueError(f"Build step {step.name} depends on unknown steps: {', '.join(unknown)}")
+
+    ordered = set()
+    remaining = list(steps)
+    while remaining:
+        ready = [step for step in remaining if all(dep in ordered for dep in step.deps)]
+        if not ready:
+            raise ValueError(f"Build steps depend on each other in a cycle: {', '.join(step.name for step in remaining)}")
+        ordered.update(step.name for step in ready)
+        remaining = [step for step in remaining if step.name not in ordered]
+
+
+def run_build(ctx, steps=STEPS, workers=None):
+    """Run ``steps`` as a DAG: a step starts once its deps finish, independent ones side by side.
+
+    Returns ``{step: (status, seconds)}`` with status built, skipped, failed or blocked.
+    With ``ctx.force`` every step is rebuilt.
+    """
+    check_graph(steps)
+    path = fingerprints_path(ctx.team)
+    stored = {} if ctx.force else _load_fingerprints(path)
+    fingerprints = {}
+    report = {}
+    pending = {step.name: step for step in steps}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            for name, step in list(pending.items()):
+                if any(dep not in report for dep in step.deps):
+                    continue
+                del pending[name]
+
+                if any(report[dep][0] in ('failed', 'blocked') for dep in step.deps):
+                    report[name] = ('blocked', 0.0)
+                    continue
+
+                fingerprints[name] = step.fingerprint(ctx, fingerprints)
+                if stored.get(name) == fingerprints[name] and all(output.exists() for output in step.outputs(ctx)):
+                    report[name] = ('skipped', 0.0)
+                    continue
+
+                running[pool.submit(_timed, step.run, ctx)] = name
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                error, seconds = future.result()
+                if error is None:
+                    report[name] = ('built', seconds)
+                    stored[name] = fingerprints[name]
+                    _save_fingerprints(path, stored)
+                else:
+                    report[name] = ('failed', seconds)
+                    stored.pop(name, None)
+                    print(f"❌ {name} failed: {error!r}")
+
+    return {step.name: report[step.name] for step in steps}
+
+
+def _timed(run, ctx):
+    start = time.perf_counter()
+    try:
+        run(ctx)
+        return None, time.perf_counter() - start
+    except Exception as error:
+        return error, time.perf_counter() - start
+
+
+def print_report(report, wall_time):
+    print(f"\n{'Step':<22} {'Status':<9} {'Time':>8}")
+    for name, (status, seconds) in report.items():
+        print(f"{name:<22} {status:<9} {seconds:>7.2f}s")
+    print(f"{'Total (wall)':<32} {wall_time:>7.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the models and generate every data artifact in one process.")
+    parser.add_argument('--model', choices=['hierarchical', 'independent'], default=c.PLAYER_GOALS_MODEL,
+                        help="Player goal model to train.")
+    parser.add_argument('--workers', type=int, default=None, help="Steps to run at once (default: one per core).")
+    parser.add_argument('--force', action='store_true', help="Rebuild every step even if its inputs are unchanged.")
+    add_team_argument(parser)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    ctx = BuildContext(args.team, args.model, args.force)
+    report = run_build(ctx, workers=args.workers)
+    print_report(report, time.perf_counter() - start)
+
+    failed = [name for name, (status, _) in report.items() if status in ('failed', 'blocked')]
+    if failed:
+        print(f"❌ Build failed: {', '.join(failed)}")
+        sys.exit(1)
+    print("✅ Build complete")
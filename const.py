@@ -1,11 +1,40 @@
+import os
 from pathlib import Path
 
 
 APP_DIR = Path.cwd()
 
 DATA_PATH                 = APP_DIR / "data"
+CACHE_PATH                = DATA_PATH / ".cache"
+# Team registry; the default team keeps the top-level data/ and models/ folders,
+# every other team gets data/teams/<slug>/ and models/teams/<slug>/
+TEAMS_FILE_PATH           = DATA_PATH / "teams.json"
+TEAMS_PATH                = DATA_PATH / "teams"
+MAX_CACHED_TEAMS          = 8  # teams whose tables and models a server process keeps in memory
+# Manager's Office writes append here; compaction folds them into the CSV snapshots
+LEDGER_FILE_PATH          = DATA_PATH / "ledger.jsonl"
+LEDGER_COMPACT_EVERY      = 25
+# Query backend behind DataLoader.query(): "pandas" (in memory) or "sqlite" (indexed copy under CACHE_PATH)
+DATA_BACKEND              = os.environ.get("FIVES_DATA_BACKEND", "pandas")
+
+MODELS_PATH               = APP_DIR / "models"
+# Player goal models: "hierarchical" (one joint model pooled across players) or "independent" (one fit per player)
+PLAYER_GOALS_MODEL        = "hierarchical"
+
+PLAYER_IMAGES_PATH        = APP_DIR / "player_images"
+THUMBNAILS_PATH           = PLAYER_IMAGES_PATH / "thumbnails"
+# Display widths used by the pages; thumbnails carry THUMBNAIL_SCALE x the pixels for high-DPI screens
+THUMBNAIL_WIDTHS          = (50, 200)
+THUMBNAIL_SCALE           = 2
 
 STATE_PATH                = APP_DIR / "state"
 SESSION_STATE_FILE_PATH   = STATE_PATH / "session_state.json"
+SESSION_STATE_FLUSH_DELAY = 1.0  # seconds of batching before a changed value is written
+# Timings, counters and cache lookups from the pages and scripts; FIVES_TELEMETRY=0 turns them off
+TELEMETRY_ENABLED         = os.environ.get("FIVES_TELEMETRY", "1") != "0"
+TELEMETRY_FILE_PATH       = STATE_PATH / "telemetry.jsonl"
+TELEMETRY_MAX_BYTES       = 5_000_000  # rotated to telemetry.jsonl.1 ... .<TELEMETRY_BACKUPS> past this size
+TELEMETRY_BACKUPS         = 3
+TELEMETRY_FLUSH_DELAY     = 5.0  # seconds of buffering before events are appended
 
 RANDOM_SEED = 1337
\ No newline at end of file
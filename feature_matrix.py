@@ -0,0 +1,106 @@
+# feature_matrix.py
+
+import numpy as np
+import pandas as pd
+from utils import DataLoader
+
+
+class FeatureMatrix:
+    """Gameweek x player training features, built once for both model trainers.
+
+    The appearance and goal matrices are dense NumPy arrays indexed by
+    (gameweek position, player position); results are joined to the gameweek
+    axis once, so every training set is an index selection on these arrays.
+    """
+
+    def __init__(self, results_df, players_df, events_df):
+        self.players = players_df['Player'].tolist()
+        self.player_index = {player: i for i, player in enumerate(self.players)}
+        self.gameweeks = np.sort(events_df['gameweek_id'].unique())
+        self.appearance_features = [f'{player}_appearance' for player in self.players]
+
+        player_pos = events_df['player_id'].map(
+            dict(zip(players_df['player_id'], range(len(players_df))))
+        ).to_numpy()
+        gameweek_pos = np.searchsorted(self.gameweeks, events_df['gameweek_id'].to_numpy())
+
+        self.appearances = np.zeros((len(self.gameweeks), len(self.players)), dtype='int64')
+        self.goals = np.zeros((len(self.gameweeks), len(self.players)), dtype='int64')
+        self.appearances[gameweek_pos, player_pos] = (events_df['appeared'].to_numpy() == 1)
+        self.goals[gameweek_pos, player_pos] = events_df['goals'].to_numpy()
+
+        # Join results onto the gameweek axis (first result row per gameweek)
+        self.results = results_df.reset_index(drop=True)
+        gameweek_results = self.results.drop_duplicates('Gameweek').set_index('Gameweek')
+        self.has_result = np.isin(self.gameweeks, gameweek_results.index)
+        self.opponent_form = gameweek_results['opponent_form'].reindex(self.gameweeks).to_numpy()
+
+        # Position of each results row on the gameweek axis (-1 if it has no events)
+        result_pos = np.searchsorted(self.gameweeks, self.results['Gameweek'].to_numpy())
+        result_pos = np.minimum(result_pos, len(self.gameweeks) - 1)
+        self.result_gameweek_pos = np.where(
+            self.gameweeks[result_pos] == self.results['Gameweek'].to_numpy(), result_pos, -1
+        )
+
+    @classmethod
+    def from_loader(cls, loader=None):
+        loader = loader or DataLoader()
+        return cls(loader.results_data(), loader.players_data(), loader.match_events())
+
+    def player_training_data(self, player):
+        """(X, y) for one player's goal model: the gameweeks they played.
+
+        Features are the opponent form plus every *other* player's appearance.
+        """
+        p = self.player_index[player]
+        rows = np.flatnonzero((self.appearances[:, p] == 1) & self.has_result)
+        others = [i for i in range(len(self.players)) if i != p]
+
+        X = pd.DataFrame(
+            np.column_stack([self.opponent_form[rows], self.appearances[np.ix_(rows, others)]]),
+            columns=['Opponent_form'] + [self.appearance_features[i] for i in others]
+        )
+        y = pd.Series(self.goals[rows, p], name='Player_Goals')
+        return X, y
+
+    def player_slices(self):
+        """Yield (player, X, y) for every player in squad order."""
+        for player in self.players:
+            X, y = self.player_training_data(player)
+            yield player, X, y
+
+    def long_training_data(self):
+        """Sparse (X, y, rows) for the joint goal model: one row per player per gameweek played.
+
+        Columns are the opponent form, every *other* player's appearance and a
+        one-hot of the scoring player; ``rows`` gives each row's player position.
+        """
+        from scipy import sparse
+
+        gameweek_pos, player_pos = np.nonzero((self.appearances == 1) & self.has_result[:, None])
+        scorer = sparse.csr_matrix(
+            (np.ones(len(player_pos)), (np.arange(len(player_pos)), player_pos)),
+            shape=(len(player_pos), len(self.players))
+        )
+        teammates = sparse.csr_matrix(self.appearances[gameweek_pos], dtype=float) - scorer
+
+        X = sparse.hstack([
+            sparse.csr_matrix(self.opponent_form[gameweek_pos].reshape(-1, 1), dtype=float),
+            teammates,
+            scorer,
+        ], format='csr')
+        y = self.goals[gameweek_pos, player_pos]
+        return X, y, player_pos
+
+    def goals_against_training_data(self):
+        """(X, y) for the goals-against model: one row per result."""
+        has_events = self.result_gameweek_pos >= 0
+        appearances = np.zeros((len(self.results), len(self.players)), dtype='int64')
+        appearances[has_events] = self.appearances[self.result_gameweek_pos[has_events]]
+
+        X = pd.DataFrame(
+            np.column_stack([self.results['opponent_form'].to_numpy(), appearances]),
+            columns=['Opponent_form'] + self.appearance_features
+        )
+        y = self.results['Score away'].rename('Score_away')
+        return X, y
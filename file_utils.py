@@ -0,0 +1,49 @@
+# file_utils.py
+
+import os
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:  # Windows: callers still serialise within their own process
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive advisory lock on ``<path>.lock`` shared across processes."""
+    with open(f"{path}.lock", 'w') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def atomic_write(path, write):
+    """Call ``write(f)`` on a temp file next to ``path``, then rename it over ``path``."""
+    tmp_path = f"{os.path.join(os.path.dirname(path), '.' + os.path.basename(path))}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def save_arrays(path, arrays, compressed=True):
+    """Write a dict of NumPy arrays to ``path`` as an ``.npz``, via a temp file and rename."""
+    import numpy as np
+
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'wb') as f:
+        (np.savez_compressed if compressed else np.savez)(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_arrays(path):
+    """Every array in the ``.npz`` at ``path``, read into memory; pickled objects are refused."""
+    import numpy as np
+
+    with np.load(path, allow_pickle=False) as arrays:
+        return {key: arrays[key] for key in arrays.files}
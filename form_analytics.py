@@ -0,0 +1,268 @@
+# form_analytics.py
+
+from collections import deque
+import numpy as np
+from telemetry import timed
+
+FORM_WINDOW = 5
+POINTS = {'Win': 3, 'Draw': 1, 'Loss': 0}
+
+# Integer counters summed over the window; every rate is a ratio of two of them
+TEAM_COUNTERS = ['games', 'wins', 'points', 'goals_for', 'goals_against']
+PLAYER_COUNTERS = ['appearances', 'goals', 'wins']
+
+
+def rolling_sum(values, window):
+    """Sum of the last ``window`` entries along the last axis, from one cumulative sum."""
+    totals = np.cumsum(values, axis=-1)
+    shifted = np.zeros_like(totals)
+    shifted[..., window:] = totals[..., :-window]
+    return totals - shifted
+
+
+def run_length(counted, reset):
+    """Number of ``counted`` entries since the last ``reset`` (0 at a reset)."""
+    counted = np.asarray(counted, dtype='int64')
+    positions = np.broadcast_to(np.arange(counted.shape[-1]), counted.shape)
+    totals = np.cumsum(counted, axis=-1)
+
+    last_reset = np.maximum.accumulate(np.where(reset, positions, -1), axis=-1)
+    at_reset = np.take_along_axis(totals, np.maximum(last_reset, 0), axis=-1)
+    return totals - np.where(last_reset >= 0, at_reset, 0)
+
+
+def current_streak(outcomes):
+    """Length of the run of identical outcomes ending at each position."""
+    outcomes = np.asarray(outcomes)
+    positions = np.arange(len(outcomes))
+    starts = np.ones(len(outcomes), dtype=bool)
+    starts[1:] = outcomes[1:] != outcomes[:-1]
+    return positions - np.maximum.accumulate(np.where(starts, positions, 0)) + 1
+
+
+def _ratio(numerator, denominator, scale=1):
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    return np.divide(numerator * scale, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+
+def team_rates(totals):
+    """Rates over the window from the summed team counters."""
+    return {
+        'win_rate': _ratio(totals['wins'], totals['games'], 100),
+        'points_per_game': _ratio(totals['points'], totals['games']),
+        'goals_for_per_game': _ratio(totals['goals_for'], totals['games']),
+        'goals_against_per_game': _ratio(totals['goals_against'], totals['games']),
+    }
+
+
+def player_rates(totals):
+    """Rates over the window's matches the player appeared in."""
+    return {
+        'goals_per_game': _ratio(totals['goals'], totals['appearances']),
+        'win_rate': _ratio(totals['wins'], totals['appearances'], 100),
+    }
+
+
+def _match_counters(results_df):
+    return {
+        'games': np.ones(len(results_df), dtype='int64'),
+        'wins': (results_df['Result'] == 'Win').to_numpy(dtype='int64'),
+        'points': results_df['Result'].map(POINTS).fillna(0).to_numpy(dtype='int64'),
+        'goals_for': results_df['Score home'].fillna(0).to_numpy(dtype='int64'),
+        'goals_against': results_df['Score away'].fillna(0).to_numpy(dtype='int64'),
+    }
+
+
+def _player_counters(results_df, player_names, named_events):
+    """Player x match counters; a gameweek's events apply to each of its result rows."""
+    match_gameweeks = results_df['Gameweek'].to_numpy()
+    gameweeks = np.unique(match_gameweeks)
+    event_gameweeks = named_events['gameweek_id'].to_numpy()
+    known = np.isin(event_gameweeks, gameweeks)
+
+    # Scatter the events into player x gameweek matrices, then lay those out on the match axis
+    rows = np.searchsorted(np.asarray(player_names, dtype=str), named_events['Player'].to_numpy(dtype=str)[known])
+    cols = np.searchsorted(gameweeks, event_gameweeks[known])
+    appeared = named_events['appeared'].to_numpy()[known]
+    scored = named_events['goals'].to_numpy()[known]
+
+    gameweek_appearances = np.zeros((len(player_names), len(gameweeks)), dtype='int64')
+    gameweek_goals = np.zeros_like(gameweek_appearances)
+    gameweek_appearances[rows, cols] = appeared == 1
+    gameweek_goals[rows, cols] = np.where(np.isin(appeared, [0, 1]), scored, 0)
+
+    match_cols = np.searchsorted(gameweeks, match_gameweeks)
+    appearances = gameweek_appearances[:, match_cols]
+    goals = gameweek_goals[:, match_cols]
+
+    wins = appearances * (results_df['Result'] == 'Win').to_numpy(dtype='int64')
+    return {'appearances': appearances, 'goals': goals, 'wins': wins}
+
+
+@timed('generate.form')
+def compute_form(results_df, named_events, window=FORM_WINDOW):
+    """Rolling form for every match in gameweek order.
+
+    Returns ``{'window', 'team', 'players', 'state'}``: per-match team series,
+    per-player series on the same match axis, and the FormTracker state that
+    lets the next match be added without recomputing.
+    """
+    results_df = results_df.sort_values('Gameweek', kind='stable').reset_index(drop=True)
+    named_events = named_events.dropna(subset=['Player'])
+    player_names = sorted(named_events['Player'].unique())
+
+    team_counters = _match_counters(results_df)
+    team_totals = {key: rolling_sum(values, window) for key, values in team_counters.items()}
+    losses = (results_df['Result'] == 'Loss').to_numpy()
+
+    counters = _player_counters(results_df, player_names, named_events)
+    player_totals = {key: rolling_sum(values, window) for key, values in counters.items()}
+    scored = (counters['appearances'] == 1) & (counters['goals'] > 0)
+    scoring_streak = run_length(scored, (counters['appearances'] == 1) & ~scored)
+
+    team = {
+        'Gameweek': results_df['Gameweek'].tolist(),
+        'Season': results_df['Season'].tolist(),
+        'Result': results_df['Result'].tolist(),
+        **{key: values.tolist() for key, values in team_rates(team_totals).items()},
+        'streak': current_streak(results_df['Result'].to_numpy()).tolist(),
+        'unbeaten': run_length(~losses, losses).tolist(),
+    }
+    rates = player_rates(player_totals)
+    players = {
+        player: {
+            **{key: values[p].tolist() for key, values in rates.items()},
+            'scoring_streak': scoring_streak[p].tolist(),
+        }
+        for p, player in enumerate(player_names)
+    }
+
+    state = {
+        'team': {key: values[-window:].tolist() for key, values in team_counters.items()},
+        'players': {
+            player: {key: values[p, -window:].tolist() for key, values in counters.items()}
+            for p, player in enumerate(player_names)
+        },
+        'streak': {
+            'result': team['Result'][-1] if len(results_df) else None,
+            'length': team['streak'][-1] if len(results_df) else 0,
+            'unbeaten': team['unbeaten'][-1] if len(results_df) else 0,
+        },
+        'scoring_streaks': {player: int(scoring_streak[p, -1]) if len(results_df) else 0 for p, player in enumerate(player_names)},
+    }
+    return {'window': window, 'team': team, 'players': players, 'state': state}
+
+
+class RollingWindow:
+    """Running total of the last ``window`` values; each push is O(1)."""
+
+    def __init__(self, window, values=()):
+        self.values = deque(values, maxlen=window)
+        self.total = sum(self.values)
+
+    def push(self, value):
+        if len(self.values) == self.values.maxlen:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+        return self.total
+
+
+class FormTracker:
+    """compute_form's state, advanced one match at a time in O(1) per metric."""
+
+    def __init__(self, window, state):
+        self.window = window
+        self.team = {key: RollingWindow(window, values) for key, values in state['team'].items()}
+        self.players = {
+            player: {key: RollingWindow(window, values) for key, values in counters.items()}
+            for player, counters in state['players'].items()
+        }
+        self.streak = dict(state['streak'])
+        self.scoring_streaks = dict(state['scoring_streaks'])
+
+    def state(self):
+        return {
+            'team': {key: list(rolling.values) for key, rolling in self.team.items()},
+            'players': {
+                player: {key: list(rolling.values) for key, rolling in counters.items()}
+                for player, counters in self.players.items()
+            },
+            'streak': dict(self.streak),
+            'scoring_streaks': dict(self.scoring_streaks),
+        }
+
+    def push_match(self, result, player_events):
+        """Add one result; ``player_events`` maps player -> (appeared, goals).
+
+        Returns the team totals and each player's totals over the window.
+        """
+        previous_matches = len(self.team['games'].values)
+        won = int(result['Result'] == 'Win')
+        team_totals = {
+            key: self.team[key].push(value) for key, value in {
+                'games': 1,
+                'wins': won,
+                'points': POINTS.get(result['Result'], 0),
+                'goals_for': int(result['Score home']),
+                'goals_against': int(result['Score away']),
+            }.items()
+        }
+
+        if result['Result'] == self.streak['result']:
+            self.streak['length'] += 1
+        else:
+            self.streak.update(result=result['Result'], length=1)
+        self.streak['unbeaten'] = 0 if result['Result'] == 'Loss' else self.streak['unbeaten'] + 1
+
+        player_totals = {}
+        for player in sorted(set(self.players) | set(player_events)):
+            # A player new to the tracker had zero counters in the earlier matches
+            counters = self.players.setdefault(player, {
+                key: RollingWindow(self.window, [0] * previous_matches) for key in PLAYER_COUNTERS
+            })
+            appeared, goals = player_events.get(player, (None, 0))
+            played = int(appeared == 1)
+            goals = int(goals) if appeared in (0, 1) else 0
+
+            player_totals[player] = {
+                'appearances': counters['appearances'].push(played),
+                'goals': counters['goals'].push(goals),
+                'wins': counters['wins'].push(played * won),
+            }
+            if played:
+                self.scoring_streaks[player] = self.scoring_streaks.get(player, 0) + 1 if goals > 0 else 0
+            self.scoring_streaks.setdefault(player, 0)
+
+        return team_totals, player_totals
+
+
+def advance_form(form, result, player_events):
+    """Append one match to a compute_form result in place (O(1) per metric)."""
+    tracker = FormTracker(form['window'], form['state'])
+    previous_matches = len(form['team']['Gameweek'])
+    team_totals, player_totals = tracker.push_match(result, player_events)
+
+    team = form['team']
+    team['Gameweek'].append(int(result['Gameweek']))
+    team['Season'].append(result['Season'])
+    team['Result'].append(result['Result'])
+    for key, value in team_rates(team_totals).items():
+        team[key].append(float(value))
+    team['streak'].append(tracker.streak['length'])
+    team['unbeaten'].append(tracker.streak['unbeaten'])
+
+    for player, totals in player_totals.items():
+        series = form['players'].setdefault(player, {
+            'goals_per_game': [0.0] * previous_matches,
+            'win_rate': [0.0] * previous_matches,
+            'scoring_streak': [0] * previous_matches,
+        })
+        for key, value in player_rates(totals).items():
+            series[key].append(float(value))
+        series['scoring_streak'].append(tracker.scoring_streaks[player])
+
+    form['players'] = dict(sorted(form['players'].items()))
+    form['state'] = tracker.state()
+    return form
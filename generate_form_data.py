@@ -0,0 +1,48 @@
+# generate_form_data.py
+
+import argparse
+import json
+import os
+from utils import DataLoader
+from match_events import with_names
+from form_analytics import FORM_WINDOW, compute_form
+from teams import add_team_argument, get_team
+
+
+def write_form(form, team=None):
+    form_path = get_team(team).form_path
+    os.makedirs(form_path.parent, exist_ok=True)
+    tmp_path = form_path.with_name(f".{form_path.name}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(form, f)
+    os.replace(tmp_path, form_path)
+
+
+def build_form(window=FORM_WINDOW, team=None):
+    loader = DataLoader(team)
+    named_events = with_names(loader.match_events(), loader.players_data())
+    form = compute_form(loader.results_data(), named_events, window)
+    write_form(form, loader.team)
+    return form
+
+
+def load_form(team=None):
+    """The stored form, built on demand for a team whose form file has not been generated yet."""
+    team = get_team(team)
+    if not team.form_path.exists():
+        return build_form(team=team)
+    with open(team.form_path, "r") as f:
+        return json.load(f)
+
+
+def generate_form_data(window=FORM_WINDOW, team=None):
+    build_form(window, team)
+    print(f"✅ Rolling form (last {window} games) saved to {get_team(team).form_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate rolling team and player form.")
+    parser.add_argument('--window', type=int, default=FORM_WINDOW, help="Number of matches in the rolling window.")
+    add_team_argument(parser)
+    args = parser.parse_args()
+    generate_form_data(args.window, args.team)
@@ -1,77 +1,64 @@
-import pandas as pd
-from sklearn.linear_model import PoissonRegressor
-from joblib import dump
+import argparse
+import os
+from feature_matrix import FeatureMatrix
+from training_cache import is_fresh, record_fingerprint, training_fingerprint
+from model_registry import GOALS_AGAINST_MODEL_FILE, build_bundle, bundle_path
+from teams import add_team_argument, get_team
+from telemetry import timed
 from utils import DataLoader
 
-# Load data
-loader = DataLoader()
-goals_df = loader.goals_data()
-appearances_df = loader.appearances_data()
-results_df = loader.results_data()
 
+def goals_against_model_path(team=None):
+    return get_team(team).models_path / GOALS_AGAINST_MODEL_FILE
 
-def create_master_dataframe(goals_df, appearances_df, results_df):
-    if 'Player' not in goals_df.columns or 'Player' not in appearances_df.columns:
-        raise KeyError("'Player' column not found in one of the dataframes")
 
-    appearances_df = appearances_df.set_index(appearances_df.columns[0])
-    all_players = goals_df['Player'].unique()
+@timed('train.goals_against')
+def train_goals_against_model(features=None, force=False, team=None):
+    """Fit and save the goals-against model; returns False on a cache hit."""
+    from joblib import dump
+    from sklearn.linear_model import PoissonRegressor
 
-    # Use list of dicts for efficient DataFrame construction
-    rows = []
+    model_path = goals_against_model_path(team)
 
-    for _, result_row in results_df.iterrows():
-        gameweek = result_row['Gameweek']
-        col_name = f'Gameweek {gameweek}'
+    # Create training data
+    features = features or FeatureMatrix.from_loader(DataLoader(team))
+    X, y = features.goals_against_training_data()
 
-        row_data = {
-            'Gameweek': gameweek,
-            'Date': result_row.get('Date'),
-            'Opponent': result_row.get('opponents'),
-            'Opponent_form': result_row.get('opponent_form'),
-            'Opponents Wins': result_row.get('opponent_wins'),
-            'Score_home': result_row.get('Score home'),
-            'Score_away': result_row.get('Score away')
-        }
+    # Sanity check for missing values
+    if X.isnull().values.any() or y.isnull().values.any():
+        print("❌ NaN values detected in input data!")
+        print("Rows with NaNs in X:")
+        print(X[X.isnull().any(axis=1)])
+        print("\nNaNs in y:")
+        print(y[y.isnull()])
+        raise ValueError("NaN values detected. Please clean the dataset before training.")
 
-        for player in all_players:
-            if player in appearances_df.index:
-                player_appearances = appearances_df.loc[player]
-                appearance_value = int(col_name in player_appearances and player_appearances[col_name] == 1)
-            else:
-                appearance_value = 0
+    clf = PoissonRegressor()
+    fingerprint = training_fingerprint(clf, X, y)
+    if not force and is_fresh(model_path, fingerprint):
+        print("Training cache: 1 hit, 0 misses")
+        print(f"✅ {model_path} is up to date")
+        return False
 
-            row_data[f'{player}_appearance'] = appearance_value
+    print("Training cache: 0 hits, 1 miss")
 
-        rows.append(row_data)
+    # Fit the model
+    clf.fit(X, y)
 
-    return pd.DataFrame(rows)
+    # Save model
+    os.makedirs(model_path.parent, exist_ok=True)
+    dump(clf, model_path)
+    record_fingerprint(model_path, fingerprint)
 
+    print(X.head())
+    print(f"✅ Model saved to {model_path}")
+    return True
 
-# Create training data
-master_df = create_master_dataframe(goals_df, appearances_df, results_df)
 
-# Drop non-feature columns
-columns_to_drop = ['Gameweek', 'Date', 'Opponent', 'Opponents Wins', 'Score_home', 'Score_away']
-X = master_df.drop(columns=columns_to_drop)
-y = master_df['Score_away']
-
-# Sanity check for missing values
-if X.isnull().values.any() or y.isnull().values.any():
-    print("❌ NaN values detected in input data!")
-    print("Rows with NaNs in X:")
-    print(X[X.isnull().any(axis=1)])
-    print("\nNaNs in y:")
-    print(y[y.isnull()])
-    raise ValueError("NaN values detected. Please clean the dataset before training.")
-
-# Fit the model
-clf = PoissonRegressor()
-clf.fit(X, y)
-
-# Save model
-filename = 'models/goals_against_model.joblib'
-dump(clf, filename)
-
-print(X.head())
-print(f"✅ Model saved to {filename}")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the goals-against model.")
+    parser.add_argument('--force', action='store_true', help="Refit even if the training data is unchanged.")
+    add_team_argument(parser)
+    args = parser.parse_args()
+    if train_goals_against_model(force=args.force, team=args.team) or not bundle_path(args.team).exists():
+        build_bundle(args.team)
@@ -1,14 +1,33 @@
 # generate_homepage_data.py
 
+import argparse
 import pandas as pd
 from utils import DataLoader
+from match_events import with_names
+from teams import add_team_argument, get_team
+from telemetry import timed
 import os
 
-def generate_homepage_data():
-    loader = DataLoader()
-    results_df = loader.results_data()
-    goals_df = loader.goals_data()
+def scorers_summary(events_df, players_df):
+    """'Player (n), Player' text for one gameweek's event rows."""
+    scoring_events = with_names(events_df[events_df['goals'] > 0].sort_values('player_id'), players_df)
+    scorers = [
+        f"{player} ({int(goals)})" if goals > 1 else player
+        for player, goals in zip(scoring_events['Player'], scoring_events['goals'])
+    ]
+    return ', '.join(scorers) if scorers else 'No goalscorers recorded.'
 
+def write_latest_match(opponent, home_score, away_score, scorers_text, team=None):
+    pd.DataFrame([{
+        'Opponent': opponent,
+        'Score Home': home_score,
+        'Score Away': away_score,
+        'Scorers Text': scorers_text
+    }]).to_csv(get_team(team).homepage_dir / "latest_match.csv", index=False)
+
+@timed('generate.homepage')
+def write_homepage_data(results_df, events_df, players_df, team=None):
+    homepage_dir = get_team(team).homepage_dir
     results_df = results_df.sort_values(by='Gameweek', ascending=True)
 
     # Compute summary stats
@@ -26,36 +45,27 @@ def generate_homepage_data():
     home_score = latest_match['Score home']
     away_score = latest_match['Score away']
     latest_gameweek = int(latest_match['Gameweek'])
-    gw_col = f'Gameweek {latest_gameweek}'
-
-    scorers = []
-    if gw_col in goals_df.columns:
-        for _, row in goals_df.iterrows():
-            goals = row[gw_col]
-            if goals > 0:
-                player = row['Player']
-                scorers.append(f"{player} ({int(goals)})" if goals > 1 else player)
-
-    scorers_text = ', '.join(scorers) if scorers else 'No goalscorers recorded.'
+    scorers_text = scorers_summary(events_df[events_df['gameweek_id'] == latest_gameweek], players_df)
 
     # Save to disk
-    os.makedirs("data/homepage", exist_ok=True)
+    os.makedirs(homepage_dir, exist_ok=True)
     pd.DataFrame({
         'Result': ['Win', 'Draw', 'Loss'],
         'Count': [win_count, draw_count, loss_count]
-    }).to_csv("data/homepage/result_counts.csv", index=False)
+    }).to_csv(homepage_dir / "result_counts.csv", index=False)
 
     pd.DataFrame({'Metric': ['Scored', 'Conceded'], 'Goals': [goals_scored, goals_against]}) \
-      .to_csv("data/homepage/goals_summary.csv", index=False)
+      .to_csv(homepage_dir / "goals_summary.csv", index=False)
 
-    pd.DataFrame({'Recent Results': recent_results}).to_csv("data/homepage/recent_results.csv", index=False)
+    pd.DataFrame({'Recent Results': recent_results}).to_csv(homepage_dir / "recent_results.csv", index=False)
 
-    pd.DataFrame([{
-        'Opponent': opponent,
-        'Score Home': home_score,
-        'Score Away': away_score,
-        'Scorers Text': scorers_text
-    }]).to_csv("data/homepage/latest_match.csv", index=False)
+    write_latest_match(opponent, home_score, away_score, scorers_text, team)
+
+def generate_homepage_data(team=None):
+    loader = DataLoader(team)
+    write_homepage_data(loader.results_data(), loader.match_events(), loader.players_data(), loader.team)
 
 if __name__ == "__main__":
-    generate_homepage_data()
+    parser = argparse.ArgumentParser(description="Generate the homepage summary files.")
+    add_team_argument(parser)
+    generate_homepage_data(parser.parse_args().team)
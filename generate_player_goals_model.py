@@ -1,89 +1,167 @@
-import pandas as pd
-from sklearn.linear_model import PoissonRegressor
-from joblib import dump
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import const as c
+from feature_matrix import FeatureMatrix
+from hierarchical_model import HierarchicalGoalModel
+from training_cache import fingerprint_path, is_fresh, record_fingerprint, training_fingerprint
+from model_registry import JOINT_MODEL_FILE, PLAYER_MODEL_SUFFIX, build_bundle, bundle_path
+from teams import add_team_argument, get_team
+from telemetry import timed
 from utils import DataLoader
 
 
-# Load data
-loader = DataLoader()
-goals_df = loader.goals_data()
-appearances_df = loader.appearances_data()
-results_df = loader.results_data()
-
-
-def create_master_dataframe_per_player(player_name, goals_df, appearances_df, results_df):
-    # Filter data for the selected player
-    player_goals = goals_df[goals_df['Player'] == player_name]
-    player_appearances = appearances_df[appearances_df['Player'] == player_name]
-
-    # Reset indices for proper alignment
-    player_goals = player_goals.set_index(goals_df.columns[0])
-    player_appearances = player_appearances.set_index(appearances_df.columns[0])
-
-    # Get the list of all players
-    all_players = goals_df['Player'].unique()
-
-    # List to collect rows (faster than appending to DataFrame)
-    master_data = []
-
-    # Iterate through each gameweek where the player has appeared
-    for gameweek in player_appearances.columns[1:]:
-        # Check if the player played in the gameweek
-        if player_appearances.loc[:, gameweek].values[0] == 1:
-            # Filter results for the current gameweek
-            gw_number = int(gameweek.split(' ')[-1])
-            results_gameweek = results_df[results_df['Gameweek'] == gw_number]
-            
-            if results_gameweek.empty:
-                continue  # Skip if no results for the current gameweek
-            
-            # Get opponent details
-            opponent_info = results_gameweek[['Date', 'opponents', 'opponent_form', 'Score home', 'Score away']].iloc[0]
-            
-            # Create a dictionary for the current row
-            row_data = {
-                'Gameweek': gameweek,
-                'Date': opponent_info['Date'],
-                'Opponent': opponent_info['opponents'],
-                'Opponent_form': opponent_info['opponent_form'],
-                'Score_home': opponent_info['Score home'],
-                'Score_away': opponent_info['Score away'],
-                'Player': player_name,
-                'Player_Goals': player_goals.loc[:, gameweek].values[0]
-            }
-            
-            # Add columns for each player with binary values indicating appearance
-            for other_player in all_players:
-                if other_player == player_name:
-                    continue
-
-                other_appearance = appearances_df[appearances_df['Player'] == other_player]
-                row_data[f'{other_player}_appearance'] = int(
-                    not other_appearance.empty and other_appearance.loc[:, gameweek].values[0] == 1
-                )
-
-            master_data.append(row_data)
-
-    return pd.DataFrame(master_data)
-
-
-# Train a Poisson regression model for each player
-all_players = goals_df['Player'].unique()
-
-for player in all_players:
-    player_master_df = create_master_dataframe_per_player(player, goals_df, appearances_df, results_df)
-
-    if player_master_df.empty:
-        print(f"Skipping {player}: no data")
-        continue
-
-    columns_to_drop = ['Gameweek', 'Date', 'Opponent', 'Player', 'Score_away', 'Score_home', 'Player_Goals']
-    X = player_master_df.drop(columns=columns_to_drop)
-    y = player_master_df['Player_Goals']
+def player_model_path(player, team=None):
+    return get_team(team).models_path / f'{player}{PLAYER_MODEL_SUFFIX}'
 
+
+def joint_model_path(team=None):
+    return get_team(team).models_path / JOINT_MODEL_FILE
+
+
+def fit_player_model(player, X, y):
+    """Fit one player's Poisson model; runs inside a worker process."""
+    from sklearn.linear_model import PoissonRegressor
+
+    start = time.perf_counter()
     clf = PoissonRegressor()
     clf.fit(X, y)
+    return player, clf, time.perf_counter() - start
+
+
+@timed('train.player_goals_independent')
+def train_player_models(workers=None, features=None, force=False, team=None):
+    """Fit and save a goal model per player, fanned out over ``workers`` processes.
+
+    ``workers=None`` uses every core; 1 fits in-process. A player whose
+    training data and hyperparameters hash to the value stored next to their
+    model is skipped unless ``force`` is set. Returns the fit time of each
+    trained player in seconds.
+    """
+    from sklearn.linear_model import PoissonRegressor
 
-    player_model_path = f'models/{player}_goal_model.joblib'
-    dump(clf, player_model_path)
-    print(f'{player} model saved to {player_model_path}')
+    team = get_team(team)
+
+    # Build the gameweek x player feature matrix once for every player model
+    features = features or FeatureMatrix.from_loader(DataLoader(team))
+
+    jobs = []
+    fingerprints = {}
+    cache_hits = []
+    for player, X, y in features.player_slices():
+        if X.empty:
+            print(f"Skipping {player}: no data")
+            continue
+
+        fingerprints[player] = training_fingerprint(PoissonRegressor(), X, y)
+        if not force and is_fresh(player_model_path(player, team), fingerprints[player]):
+            cache_hits.append(player)
+            continue
+        jobs.append((player, X, y))
+
+    print(f"Training cache: {len(cache_hits)} hits, {len(jobs)} misses")
+    if not jobs:
+        return {}
+
+    # The per-player files are about to stop being views of the joint model
+    _discard_fingerprint(joint_model_path(team))
+
+    if workers == 1:
+        fitted = (fit_player_model(*job) for job in jobs)
+        return _save_models(fitted, fingerprints, team)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fit_player_model, *job) for job in jobs]
+        return _save_models((future.result() for future in as_completed(futures)), fingerprints, team)
+
+
+def _save_models(fitted, fingerprints, team):
+    from joblib import dump
+
+    os.makedirs(team.models_path, exist_ok=True)
+    fit_times = {}
+
+    for player, clf, fit_time in fitted:
+        model_path = player_model_path(player, team)
+        dump(clf, model_path)
+        record_fingerprint(model_path, fingerprints[player])
+        fit_times[player] = fit_time
+        print(f'{player} model saved to {model_path} (fit {fit_time:.2f}s)')
+
+    return fit_times
+
+
+@timed('train.player_goals_hierarchical')
+def train_hierarchical_model(features=None, force=False, team=None):
+    """Fit the joint goal model once and save a view of it as every player's model.
+
+    Players without a game get the squad-average view instead of being
+    skipped. Returns ``{player: fit time}`` for the players written, or ``{}``
+    on a cache hit.
+    """
+    from joblib import dump
+
+    team = get_team(team)
+    features = features or FeatureMatrix.from_loader(DataLoader(team))
+    model = HierarchicalGoalModel()
+    model_path = joint_model_path(team)
+
+    X, y, _ = features.long_training_data()
+    fingerprint = training_fingerprint(
+        model.estimator(X.shape[0]),
+        X,
+        y,
+        model.settings(len(features.players)),
+        columns=model.feature_names_for(features)
+    )
+    if not force and is_fresh(model_path, fingerprint):
+        print("Training cache: 1 hit, 0 misses")
+        return {}
+
+    print("Training cache: 0 hits, 1 miss")
+    start = time.perf_counter()
+    model.fit(features)
+    fit_time = time.perf_counter() - start
+
+    os.makedirs(team.models_path, exist_ok=True)
+    for player, view in model.player_views().items():
+        view_path = player_model_path(player, team)
+        dump(view, view_path)
+        # A view is not an independent fit; make the independent trainer redo it
+        _discard_fingerprint(view_path)
+
+    dump(model, model_path)
+    record_fingerprint(model_path, fingerprint)
+    print(f'Joint model saved to {model_path} with {len(model.players)} player views (fit {fit_time:.2f}s)')
+    return {player: fit_time for player in model.players}
+
+
+def _discard_fingerprint(model_path):
+    fingerprint_path(model_path).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train a Poisson goal model for every player.")
+    parser.add_argument('--model', choices=['hierarchical', 'independent'], default=c.PLAYER_GOALS_MODEL,
+                        help="One joint model pooled across players, or one model per player.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Number of worker processes (default: one per core, 1 to fit in-process).")
+    parser.add_argument('--force', action='store_true', help="Refit every player even if their data is unchanged.")
+    add_team_argument(parser)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.model == 'hierarchical':
+        fit_times = train_hierarchical_model(force=args.force, team=args.team)
+        if fit_times:
+            print(f"✅ Trained the joint goal model for {len(fit_times)} players in {time.perf_counter() - start:.2f}s")
+        else:
+            print("✅ Joint goal model is up to date (training cache hit), nothing refit")
+    else:
+        fit_times = train_player_models(workers=args.workers, force=args.force, team=args.team)
+        print(f"✅ Trained {len(fit_times)} player models in {time.perf_counter() - start:.2f}s "
+              f"({sum(fit_times.values()):.2f}s of fitting)")
+
+    if fit_times or not bundle_path(args.team).exists():
+        build_bundle(args.team)
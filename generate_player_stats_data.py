@@ -1,76 +1,141 @@
 # generate_player_stats_data.py
 
+import argparse
 import os
+import sys
 import json
+import numpy as np
 from utils import DataLoader
-import pandas as pd
+from teams import add_team_argument, get_team
+from telemetry import timed
+
+
+def season_stats(goals, appearances, games, goals_for, goals_against, wins):
+    """Stats entry for one player and season.
+
+    The raw counters are stored alongside the averages so a new gameweek can be
+    applied as a delta without rescanning history.
+    """
+    return {
+        'goals_scored': int(goals),
+        'appearances': int(appearances),
+        'avg_team_goals_scored': float(goals_for / games) if games > 0 else 0.0,
+        'avg_team_goals_conceded': float(goals_against / games) if games > 0 else 0.0,
+        'win_rate': float((wins / games) * 100) if games > 0 else 0.0,
+        'goals_per_game': float(goals / appearances) if appearances > 0 else 0.0,
+        'games_played': int(games),
+        'team_goals_scored': int(goals_for),
+        'team_goals_conceded': int(goals_against),
+        'wins': int(wins)
+    }
+
+
+@timed('generate.player_stats')
+def compute_player_stats(results_df, players_df, events_df):
+    """Per-player, per-season stats from a handful of matrix products.
+
+    Builds player x gameweek appearance/goal matrices, a gameweek x season
+    indicator (first column is 'All Seasons') and per-gameweek result totals,
+    so every aggregate is one ``@`` instead of a loop over cells.
+    """
+    gameweeks = np.sort(events_df['gameweek_id'].unique())
+    player_pos = events_df['player_id'].map(
+        dict(zip(players_df['player_id'], range(len(players_df))))
+    ).to_numpy()
+    gameweek_pos = np.searchsorted(gameweeks, events_df['gameweek_id'].to_numpy())
+
+    # Player x gameweek matrices. A recorded 0 appearance still counts goals.
+    appeared = events_df['appeared'].to_numpy()
+    played = np.zeros((len(players_df), len(gameweeks)))
+    recorded_goals = np.zeros((len(players_df), len(gameweeks)))
+    has_events = np.zeros(len(players_df), dtype=bool)
+    played[player_pos, gameweek_pos] = appeared == 1
+    recorded_goals[player_pos, gameweek_pos] = np.where(np.isin(appeared, [0, 1]), events_df['goals'].to_numpy(), 0)
+    has_events[player_pos] = True
+
+    # Gameweek x season indicator
+    seasons = sorted(results_df['Season'].unique())
+    season_by_gameweek = results_df.set_index('Gameweek')['Season'].to_dict()
+    gameweek_seasons = np.array([season_by_gameweek.get(gw) for gw in gameweeks], dtype=object)
+    in_season = np.column_stack(
+        [np.ones(len(gameweeks))] + [gameweek_seasons == season for season in seasons]
+    ).astype(float)
+
+    # Per-gameweek result totals (a gameweek can have several result rows)
+    results_by_gameweek = results_df.assign(
+        games=1, wins=(results_df['Result'] == 'Win').astype(int)
+    ).groupby('Gameweek')[['games', 'Score home', 'Score away', 'wins']].sum()
+    results_by_gameweek = results_by_gameweek.reindex(gameweeks, fill_value=0).to_numpy(dtype=float)
+
+    total_goals = recorded_goals @ in_season
+    total_appearances = played @ in_season
+    # (player x season x result-metric): played games' result totals per season
+    result_totals = np.einsum('pg,gs,gm->psm', played, in_season, results_by_gameweek)
 
-def calculate_all_player_stats():
-    loader = DataLoader()
-    goals_df = loader.goals_data()
-    appearances_df = loader.appearances_data()
-    results_df = loader.results_data()
-
-    season_by_Gameweek = results_df.set_index('Gameweek')['Season'].to_dict()
     all_stats = {}
-
-    for player in goals_df['Player'].unique():
-        player_goals = goals_df[goals_df['Player'] == player]
-        player_appearances = appearances_df[appearances_df['Player'] == player]
-
-        if player_appearances.empty or player_goals.empty:
+    season_keys = ['All Seasons'] + seasons
+    for p, player in enumerate(players_df['Player']):
+        if not has_events[p]:
             continue
 
-        Gameweek_cols = [col for col in goals_df.columns if col.startswith('Gameweek')]
         player_stats_by_season = {}
+        for s, key in enumerate(season_keys):
+            games, goals_for, goals_against, wins = result_totals[p, s]
+            player_stats_by_season[key] = season_stats(
+                total_goals[p, s], total_appearances[p, s], games, goals_for, goals_against, wins
+            )
 
-        for season in [None] + sorted(results_df['Season'].unique()):
-            total_goals = 0
-            total_appearances = 0
-            played_Gameweeks = []
-
-            for col in Gameweek_cols:
-                gw_num = int(col.split()[-1])
-                if season and season_by_Gameweek.get(gw_num) != season:
-                    continue
-
-                appearance = player_appearances[col].values[0]
-                goals = player_goals[col].values[0]
-
-                if appearance == 1:
-                    played_Gameweeks.append(gw_num)
-                    total_appearances += 1
-                    total_goals += goals
-                elif appearance == 0:
-                    total_goals += goals
-
-            relevant_results = results_df[results_df['Gameweek'].isin(played_Gameweeks)]
-
-            avg_goals_for = relevant_results['Score home'].mean() if not relevant_results.empty else 0
-            avg_goals_against = relevant_results['Score away'].mean() if not relevant_results.empty else 0
-            wins = relevant_results[relevant_results['Result'] == 'Win'].shape[0]
-            total_games_played = relevant_results.shape[0]
-            win_rate = (wins / total_games_played) * 100 if total_games_played > 0 else 0
-            goals_per_game = total_goals / total_appearances if total_appearances > 0 else 0
-
-            key = 'All Seasons' if season is None else season
-            player_stats_by_season[key] = {
-            'goals_scored': int(total_goals),
-            'appearances': int(total_appearances),
-            'avg_team_goals_scored': float(avg_goals_for),
-            'avg_team_goals_conceded': float(avg_goals_against),
-            'win_rate': float(win_rate),
-            'goals_per_game': float(goals_per_game)
-            }
+        all_stats[player] = player_stats_by_season
 
+    return all_stats
+
+
+def load_player_stats(team=None):
+    loader = DataLoader(team)
+    return compute_player_stats(loader.results_data(), loader.players_data(), loader.match_events())
 
-        all_stats[player] = player_stats_by_season
 
-    os.makedirs("data/player_stats", exist_ok=True)
-    with open("data/player_stats/player_stats.json", "w") as f:
+def write_player_stats(all_stats, team=None):
+    player_stats_path = get_team(team).player_stats_path
+    os.makedirs(player_stats_path.parent, exist_ok=True)
+    with open(player_stats_path, "w") as f:
         json.dump(all_stats, f, indent=2)
 
-    print("✅ Player stats data generated and saved to data/player_stats/player_stats.json")
+
+def calculate_all_player_stats(team=None):
+    write_player_stats(load_player_stats(team), team)
+    print(f"✅ Player stats data generated and saved to {get_team(team).player_stats_path}")
+
+
+def check_player_stats(team=None):
+    """Compare freshly computed stats with the JSON currently on disk."""
+    player_stats_path = get_team(team).player_stats_path
+    with open(player_stats_path, "r") as f:
+        saved_stats = json.load(f)
+
+    computed_stats = json.loads(json.dumps(load_player_stats(team)))
+    mismatches = [
+        f"{player} / {season}"
+        for player in sorted(set(saved_stats) | set(computed_stats))
+        for season in sorted(set(saved_stats.get(player, {})) | set(computed_stats.get(player, {})))
+        if saved_stats.get(player, {}).get(season) != computed_stats.get(player, {}).get(season)
+    ]
+
+    if mismatches:
+        print(f"❌ {len(mismatches)} player/season entries differ from {player_stats_path}:")
+        for mismatch in mismatches:
+            print(f"   {mismatch}")
+        return False
+
+    print(f"✅ Computed player stats match {player_stats_path}")
+    return True
+
 
 if __name__ == "__main__":
-    calculate_all_player_stats()
+    parser = argparse.ArgumentParser(description="Generate per-player, per-season stats.")
+    parser.add_argument('--check', action='store_true', help="Compare a fresh computation with the saved JSON.")
+    add_team_argument(parser)
+    args = parser.parse_args()
+    if args.check:
+        sys.exit(0 if check_player_stats(args.team) else 1)
+    calculate_all_player_stats(args.team)
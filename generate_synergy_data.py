@@ -0,0 +1,115 @@
+# generate_synergy_data.py
+
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from utils import DataLoader
+from match_events import with_names
+from file_utils import load_arrays, save_arrays
+from teams import add_team_argument, get_team
+from telemetry import timed
+
+SYNERGY_MATRICES = ['games', 'wins', 'goal_diff']
+
+
+def appearance_matrix(results_df, events_df, players_df):
+    """Gameweek x player 0/1 matrix of who played, over the gameweeks with a result.
+
+    Returns ``(players, A, results)`` with ``players`` sorted by name and
+    ``results`` aligned to the rows of ``A``.
+    """
+    results = results_df.dropna(subset=['Gameweek']).sort_values('Gameweek', kind='stable').drop_duplicates('Gameweek')
+    named = with_names(events_df[events_df['appeared'] == 1], players_df).dropna(subset=['Player'])
+    named = named[named['gameweek_id'].isin(results['Gameweek'])]
+
+    players = np.array(sorted(named['Player'].unique()), dtype=str)
+    gameweeks = results['Gameweek'].to_numpy(dtype='int64')
+    A = np.zeros((len(gameweeks), len(players)), dtype='int64')
+    A[np.searchsorted(gameweeks, named['gameweek_id'].to_numpy()), np.searchsorted(players, named['Player'].to_numpy(dtype=str))] = 1
+    return players, A, results
+
+
+@timed('generate.synergy')
+def synergy_matrix(results_df, events_df, players_df):
+    """P x P matrices of games, wins and goal difference with both players on the pitch.
+
+    Computed as AᵀA, Aᵀ·diag(win)·A and Aᵀ·diag(gd)·A; the diagonal holds each
+    player's own totals.
+    """
+    players, A, results = appearance_matrix(results_df, events_df, players_df)
+    won = (results['Result'] == 'Win').to_numpy(dtype='int64')
+    goal_diff = (results['Score home'].fillna(0) - results['Score away'].fillna(0)).to_numpy(dtype='int64')
+
+    return {
+        'players': players,
+        'games': A.T @ A,
+        'wins': (A * won[:, None]).T @ A,
+        'goal_diff': (A * goal_diff[:, None]).T @ A,
+    }
+
+
+def update_synergy(arrays, gameweek_players, result, sign=1):
+    """Add (sign=1) or take back (sign=-1) one gameweek as a rank-one update a·aᵀ."""
+    players = np.array(sorted(set(arrays['players']) | set(gameweek_players)), dtype=str)
+    old = np.searchsorted(players, arrays['players'])
+    a = np.zeros(len(players), dtype='int64')
+    a[np.searchsorted(players, np.array(list(gameweek_players), dtype=str))] = 1
+    outer = np.outer(a, a)
+
+    weights = {
+        'games': 1,
+        'wins': int(result['Result'] == 'Win'),
+        'goal_diff': int(result['Score home']) - int(result['Score away']),
+    }
+    updated = {'players': players}
+    for key in SYNERGY_MATRICES:
+        matrix = np.zeros((len(players), len(players)), dtype='int64')
+        matrix[np.ix_(old, old)] = arrays[key]
+        updated[key] = matrix + sign * weights[key] * outer
+
+    # Like the full build, only players with an appearance are kept
+    played = np.diag(updated['games']) > 0
+    return {key: values[played] if key == 'players' else values[np.ix_(played, played)] for key, values in updated.items()}
+
+
+def pair_table(arrays, min_games=1):
+    """One row per pair of players who played at least ``min_games`` together."""
+    rows, cols = np.triu_indices(len(arrays['players']), k=1)
+    games = arrays['games'][rows, cols]
+    keep = games >= max(min_games, 1)
+    rows, cols, games = rows[keep], cols[keep], games[keep]
+
+    wins = arrays['wins'][rows, cols]
+    goal_diff = arrays['goal_diff'][rows, cols]
+    return pd.DataFrame({
+        'Player 1': arrays['players'][rows],
+        'Player 2': arrays['players'][cols],
+        'Games Together': games,
+        'Wins Together': wins,
+        'Win Rate': wins / games * 100,
+        'Goal Difference': goal_diff,
+        'Goal Difference Per Game': goal_diff / games,
+    })
+
+
+def write_synergy(arrays, team=None):
+    synergy_path = get_team(team).synergy_path
+    os.makedirs(synergy_path.parent, exist_ok=True)
+    save_arrays(synergy_path, arrays)
+
+
+def load_synergy(team=None):
+    return load_arrays(get_team(team).synergy_path)
+
+
+def generate_synergy_data(team=None):
+    loader = DataLoader(team)
+    write_synergy(synergy_matrix(loader.results_data(), loader.match_events(), loader.players_data()), loader.team)
+    print(f"✅ Partnership synergy matrix saved to {loader.team.synergy_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the player-pair synergy matrix.")
+    add_team_argument(parser)
+    generate_synergy_data(parser.parse_args().team)
@@ -1,44 +1,83 @@
-import pandas as pd
+import argparse
+import numpy as np
 import os
-import json
 from utils import DataLoader
+from match_store import PandasMatchStore
+from file_utils import save_arrays
+from match_events import with_names
+from teams import add_team_argument, get_team
+from telemetry import timed
 
-def prepare_goals_long(df):
-    goals_long = pd.melt(df, id_vars=['Player'], var_name='Gameweek', value_name='Goals')
-    goals_long['Gameweek'] = goals_long['Gameweek'].str.extract(r'(\d+)').astype(int)
-    goals_long = goals_long.sort_values(by=['Player', 'Gameweek'])
-    goals_long['Cumulative Goals'] = goals_long.groupby('Player')['Goals'].cumsum()
-    return goals_long
+ALL_SEASONS_FILE = "all_seasons.npz"
 
-def generate_all_goals_data():
-    loader = DataLoader()
-    goals_df = loader.goals_data()
-    results_df = loader.results_data()
+def season_stats_file(season):
+    return ALL_SEASONS_FILE if season is None else f"{season}.npz"
 
-    all_seasons = results_df['Season'].unique().tolist()
-    all_seasons.sort()
+def cumulative_goals(events_df, players_df):
+    """Player x gameweek cumulative goals for the team stats plots.
 
-    output_dir = "data/team_stats"
-    os.makedirs(output_dir, exist_ok=True)
+    Returns ``players`` (sorted names), ``gameweeks``, ``cumulative`` (running
+    goal totals) and ``recorded`` (True where the player has an event row, i.e.
+    a point on their line).
+    """
+    named = with_names(events_df, players_df).dropna(subset=['Player'])
+    players = np.array(sorted(named['Player'].unique()), dtype=str)
+    gameweeks = np.sort(named['gameweek_id'].unique()).astype('int64')
 
-    # Save all seasons
-    all_data = prepare_goals_long(goals_df)
-    all_data.to_csv(f"{output_dir}/all_seasons.csv", index=False)
+    rows = np.searchsorted(players, named['Player'].to_numpy(dtype=str))
+    cols = np.searchsorted(gameweeks, named['gameweek_id'].to_numpy())
+    goals = np.zeros((len(players), len(gameweeks)), dtype='int64')
+    recorded = np.zeros((len(players), len(gameweeks)), dtype=bool)
+    goals[rows, cols] = named['goals'].to_numpy()
+    recorded[rows, cols] = True
+
+    return {
+        'players': players,
+        'gameweeks': gameweeks,
+        'cumulative': np.cumsum(goals, axis=1),
+        'recorded': recorded,
+    }
+
+def season_cumulative_goals(season, store, players_df):
+    # Indexed season and gameweek lookups instead of filtering the whole history
+    season_events = store.gameweek_events(store.season_gameweeks(season))
+    season_data = cumulative_goals(season_events, players_df)
+
+    # Number the season's gameweeks from 1
+    season_data['gameweeks'] = np.arange(1, len(season_data['gameweeks']) + 1)
+    return season_data
 
-    for season in all_seasons:
-        season_gameweeks = results_df[results_df['Season'] == season]['Gameweek']
-        gameweek_cols = [f'Gameweek {int(gw)}' for gw in season_gameweeks if f'Gameweek {int(gw)}' in goals_df.columns]
-        filtered_df = goals_df[['Player'] + gameweek_cols]
+@timed('generate.team_stats')
+def write_team_stats(results_df, events_df, players_df, seasons=None, team=None):
+    """Write the all-seasons file plus ``seasons`` (default: every season).
 
-        season_data = prepare_goals_long(filtered_df)
+    Writing every season also removes the files of seasons no longer in the results.
+    """
+    team_stats_dir = get_team(team).team_stats_dir
+    os.makedirs(team_stats_dir, exist_ok=True)
+
+    if seasons is None:
+        seasons = sorted(results_df['Season'].unique().tolist())
+        current = {ALL_SEASONS_FILE} | {season_stats_file(season) for season in seasons}
+        for path in team_stats_dir.glob("*.npz"):
+            if path.name not in current:
+                path.unlink()
+
+    # Save all seasons
+    save_arrays(team_stats_dir / ALL_SEASONS_FILE, cumulative_goals(events_df, players_df))
 
-        # Remap gameweeks to start from 1
-        mapping = {gw: i+1 for i, gw in enumerate(sorted(season_data['Gameweek'].unique()))}
-        season_data['Gameweek'] = season_data['Gameweek'].map(mapping)
+    store = PandasMatchStore(results_df, events_df)
+    for season in seasons:
+        season_data = season_cumulative_goals(season, store, players_df)
+        save_arrays(team_stats_dir / season_stats_file(season), season_data)
 
-        season_data.to_csv(f"{output_dir}/{season}.csv", index=False)
+def generate_all_goals_data(team=None):
+    loader = DataLoader(team)
+    write_team_stats(loader.results_data(), loader.match_events(), loader.players_data(), team=loader.team)
 
-    print(f"✅ Team stats data saved to {output_dir}/team_stats/")
+    print(f"✅ Team stats data saved to {loader.team.team_stats_dir}/")
 
 if __name__ == "__main__":
-    generate_all_goals_data()
+    parser = argparse.ArgumentParser(description="Generate the cumulative-goals arrays for the team stats page.")
+    add_team_argument(parser)
+    generate_all_goals_data(parser.parse_args().team)
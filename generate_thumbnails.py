@@ -0,0 +1,56 @@
+# generate_thumbnails.py
+
+import argparse
+import os
+from PIL import Image, features
+import const as c
+from teams import add_team_argument, get_team
+from telemetry import timed
+
+
+def thumbnail_path(player, width, team=None):
+    extension = 'webp' if features.check('webp') else 'png'
+    return get_team(team).thumbnails_path / f"{player}_{width}.{extension}"
+
+
+def make_thumbnail(source_path, width):
+    """Resize an image to ``width`` display pixels (times THUMBNAIL_SCALE)."""
+    with Image.open(source_path) as image:
+        image = image.convert('RGBA')
+        pixel_width = min(width * c.THUMBNAIL_SCALE, image.width)
+        pixel_height = round(image.height * pixel_width / image.width)
+        return image.resize((pixel_width, pixel_height), Image.LANCZOS)
+
+
+def save_thumbnail(image, path):
+    if path.suffix == '.webp':
+        image.save(path, 'WEBP', quality=80, method=6)
+    else:
+        image.save(path, 'PNG', optimize=True)
+
+
+@timed('generate.thumbnails')
+def generate_thumbnails(force=False, team=None):
+    team = get_team(team)
+    os.makedirs(team.thumbnails_path, exist_ok=True)
+    written = 0
+
+    for source_path in sorted(team.images_path.glob('*.png')):
+        player = source_path.stem
+        for width in c.THUMBNAIL_WIDTHS:
+            path = thumbnail_path(player, width, team)
+            # Skip thumbnails that are newer than their source image
+            if not force and path.exists() and path.stat().st_mtime >= source_path.stat().st_mtime:
+                continue
+            save_thumbnail(make_thumbnail(source_path, width), path)
+            written += 1
+
+    print(f"✅ {written} player thumbnails written to {team.thumbnails_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build resized player image thumbnails.")
+    parser.add_argument('--force', action='store_true', help="Rebuild thumbnails even if they are up to date.")
+    add_team_argument(parser)
+    args = parser.parse_args()
+    generate_thumbnails(force=args.force, team=args.team)
@@ -0,0 +1,85 @@
+# hierarchical_model.py
+
+import numpy as np
+from model_scorer import PoissonScorer
+
+# Ridge penalties in observations' worth of evidence: a player's own effect
+# needs a few games before it moves far from the squad average
+RANDOM_EFFECT_PENALTY = 5.0
+FIXED_EFFECT_PENALTY  = 50.0
+
+
+class HierarchicalGoalModel:
+    """One Poisson GLM for every player's goals, fit once on the long-format rows.
+
+    log E[goals of p in gameweek g] = intercept + u_p + b * opponent form + sum of t_q over p's teammates q
+
+    The player effects ``u_p`` are random effects with a stronger ridge
+    penalty, so fringe players are pooled towards the squad average and a
+    player with no games gets the average itself. The teammate effects ``t_q``
+    and the opponent-form coefficient are shared by every player.
+    PoissonRegressor has a single ``alpha``; per-column penalties come from
+    scaling the columns, since scaling a column by ``s`` divides the effective
+    penalty on its coefficient by ``s**2``.
+    """
+
+    def __init__(self, random_effect_penalty=RANDOM_EFFECT_PENALTY, fixed_effect_penalty=FIXED_EFFECT_PENALTY, max_iter=1000):
+        self.random_effect_penalty = random_effect_penalty
+        self.fixed_effect_penalty = fixed_effect_penalty
+        self.max_iter = max_iter
+
+    def estimator(self, n_rows=1):
+        # Only training needs sklearn; the player views score with NumPy
+        from sklearn.linear_model import PoissonRegressor
+
+        # Penalties are per observation in PoissonRegressor's mean deviance
+        return PoissonRegressor(alpha=1 / max(n_rows, 1), max_iter=self.max_iter)
+
+    def feature_names_for(self, features):
+        """Names of the columns of ``features.long_training_data()``."""
+        return ['Opponent_form'] + list(features.appearance_features) + [f'{player}_player' for player in features.players]
+
+    def settings(self, n_players):
+        """Everything besides the data and the estimator that shapes the fit, for the training cache."""
+        return {
+            'random_effect_penalty': self.random_effect_penalty,
+            'fixed_effect_penalty': self.fixed_effect_penalty,
+            'max_iter': self.max_iter,
+            'column_scales': self.column_scales(n_players).tolist(),
+        }
+
+    def column_scales(self, n_players):
+        fixed = np.full(1 + n_players, 1 / np.sqrt(self.fixed_effect_penalty))
+        random = np.full(n_players, 1 / np.sqrt(self.random_effect_penalty))
+        return np.concatenate([fixed, random])
+
+    def fit(self, features):
+        """Fit on a FeatureMatrix's long training data."""
+        X, y, _ = features.long_training_data()
+        scales = self.column_scales(len(features.players))
+
+        clf = self.estimator(X.shape[0])
+        clf.fit(X.multiply(scales).tocsr(), y)
+        coef = clf.coef_ * scales
+
+        self.players = list(features.players)
+        self.feature_names = self.feature_names_for(features)
+        self.intercept = clf.intercept_
+        self.form_coef = coef[0]
+        self.teammate_coefs = coef[1:1 + len(self.players)]
+        self.player_effects = coef[1 + len(self.players):]
+        return self
+
+    def player_view(self, player):
+        """``player``'s goal model; a player the model has not seen gets the squad average."""
+        p = self.players.index(player) if player in self.players else None
+        others = [i for i in range(len(self.players)) if i != p]
+        return PoissonScorer(
+            ['Opponent_form'] + [self.feature_names[1 + i] for i in others],
+            np.concatenate([[self.form_coef], self.teammate_coefs[others]]),
+            self.intercept + (self.player_effects[p] if p is not None else 0.0),
+        )
+
+    def player_views(self):
+        return {player: self.player_view(player) for player in self.players}
+
@@ -0,0 +1,232 @@
+# incremental_update.py
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from generate_homepage_data import scorers_summary, write_homepage_data, write_latest_match
+from generate_player_stats_data import compute_player_stats, season_stats, write_player_stats
+from generate_team_stats_data import ALL_SEASONS_FILE, season_stats_file, write_team_stats
+from generate_form_data import load_form, write_form
+from form_analytics import advance_form, compute_form
+from generate_synergy_data import load_synergy, synergy_matrix, update_synergy, write_synergy
+from match_events import with_names
+from file_utils import load_arrays, save_arrays
+from teams import get_team
+from telemetry import timed
+
+
+def derived_files(team):
+    return [
+        team.player_stats_path,
+        team.homepage_dir / "result_counts.csv",
+        team.homepage_dir / "goals_summary.csv",
+        team.homepage_dir / "recent_results.csv",
+        team.team_stats_dir / ALL_SEASONS_FILE,
+        team.form_path,
+        team.synergy_path,
+    ]
+
+
+@timed('incremental.rebuild')
+def rebuild_stats(results_df, events_df, players_df, team=None):
+    """Full regeneration of the homepage, player and team stats artifacts."""
+    write_homepage_data(results_df, events_df, players_df, team)
+    write_player_stats(compute_player_stats(results_df, players_df, events_df), team)
+    write_team_stats(results_df, events_df, players_df, team=team)
+    write_form(compute_form(results_df, with_names(events_df, players_df)), team)
+    write_synergy(synergy_matrix(results_df, events_df, players_df), team)
+
+
+@timed('incremental.apply_gameweek')
+def apply_new_gameweek(results_df, events_df, players_df, gameweek, replaced=False, team=None):
+    """Fold a just-saved gameweek into the derived stats as a delta.
+
+    ``results_df``/``events_df`` are the saved tables including ``gameweek``;
+    ``replaced`` says the save overwrote an existing record of it.
+    Only a single new result that is later than every existing gameweek can be
+    appended; anything else (a replaced gameweek, a back-filled one, missing
+    artifacts, a team stats file that already reaches the gameweek) falls back
+    to a full rebuild. Returns True when the delta path was used.
+    """
+    team = get_team(team)
+    new_results = results_df[results_df['Gameweek'] == gameweek]
+    previous_results = results_df[results_df['Gameweek'] != gameweek]
+
+    if (replaced
+            or len(new_results) != 1
+            or (not previous_results.empty and gameweek < previous_results['Gameweek'].max())
+            or not all(os.path.exists(path) for path in derived_files(team))):
+        rebuild_stats(results_df, events_df, players_df, team)
+        return False
+
+    result = new_results.iloc[0]
+    gameweek_events = events_df[events_df['gameweek_id'] == gameweek]
+    season_gameweeks = results_df.loc[results_df['Season'] == result['Season'], 'Gameweek']
+    season_gameweek = events_df.loc[events_df['gameweek_id'].isin(season_gameweeks), 'gameweek_id'].nunique()
+
+    # A cumulative-goals file that already reaches the new gameweek is out of step with the results
+    if (not _appends_after(team.team_stats_dir / ALL_SEASONS_FILE, gameweek)
+            or not _appends_after(team.team_stats_dir / season_stats_file(result['Season']), season_gameweek)):
+        rebuild_stats(results_df, events_df, players_df, team)
+        return False
+
+    named_events = with_names(gameweek_events, players_df)
+
+    _update_player_stats(result, named_events, sign=1, team=team)
+    _update_homepage(result, gameweek_events, players_df, team)
+    _append_team_stats(team.team_stats_dir / ALL_SEASONS_FILE, gameweek, named_events)
+    _append_team_stats(team.team_stats_dir / season_stats_file(result['Season']), season_gameweek, named_events)
+    _update_form(result, named_events, team)
+    _update_synergy(result, named_events, sign=1, team=team)
+    return True
+
+
+@timed('incremental.remove_gameweek')
+def remove_gameweek(results_df, events_df, players_df, gameweek, team=None):
+    """Take a gameweek back out of the derived stats.
+
+    ``results_df``/``events_df`` are the tables *before* the removal. Player
+    stats are updated as a delta; the homepage and the affected season's
+    cumulative-goals file are regenerated since later rows shift.
+    """
+    team = get_team(team)
+    removed_results = results_df[results_df['Gameweek'] == gameweek]
+    remaining_results = results_df[results_df['Gameweek'] != gameweek]
+    remaining_events = events_df[events_df['gameweek_id'] != gameweek]
+    removed_events = with_names(events_df[events_df['gameweek_id'] == gameweek], players_df)
+
+    if (len(removed_results) != 1
+            or remaining_results.empty
+            or not all(os.path.exists(path) for path in derived_files(team))
+            or not removed_events['player_id'].isin(remaining_events['player_id']).all()
+            or removed_results.iloc[0]['Season'] not in set(remaining_results['Season'])):
+        rebuild_stats(remaining_results, remaining_events, players_df, team)
+        return False
+
+    result = removed_results.iloc[0]
+    _update_player_stats(result, removed_events, sign=-1, team=team)
+    _update_synergy(result, removed_events, sign=-1, team=team)
+    write_homepage_data(remaining_results, remaining_events, players_df, team)
+    write_team_stats(remaining_results, remaining_events, players_df, seasons=[result['Season']], team=team)
+    # Rolling windows cannot be unwound, so form is recomputed
+    write_form(compute_form(remaining_results, with_names(remaining_events, players_df)), team)
+    return True
+
+
+def _update_player_stats(result, gameweek_events, sign, team):
+    with open(team.player_stats_path, "r") as f:
+        all_stats = json.load(f)
+
+    season = result['Season']
+    seasons = sorted({key for stats in all_stats.values() for key in stats if key != 'All Seasons'} | {season})
+    empty = season_stats(0, 0, 0, 0, 0, 0)
+
+    for player, appeared, goals in zip(gameweek_events['Player'], gameweek_events['appeared'], gameweek_events['goals']):
+        player_stats = all_stats.setdefault(player, {})
+
+        for key in ('All Seasons', season):
+            stats = player_stats.get(key, empty)
+            counters = {
+                'goals': stats['goals_scored'],
+                'appearances': stats['appearances'],
+                'games': stats['games_played'],
+                'goals_for': stats['team_goals_scored'],
+                'goals_against': stats['team_goals_conceded'],
+                'wins': stats['wins'],
+            }
+
+            # Same rules as the full computation: a recorded 0 still counts goals
+            if appeared in (0, 1):
+                counters['goals'] += sign * int(goals)
+            if appeared == 1:
+                counters['appearances'] += sign
+                counters['games'] += sign
+                counters['goals_for'] += sign * int(result['Score home'])
+                counters['goals_against'] += sign * int(result['Score away'])
+                counters['wins'] += sign * int(result['Result'] == 'Win')
+
+            player_stats[key] = season_stats(**counters)
+
+    # Every player carries every season, in the order the full build writes them
+    for player, player_stats in all_stats.items():
+        all_stats[player] = {key: player_stats.get(key, empty) for key in ['All Seasons'] + seasons}
+
+    write_player_stats(all_stats, team)
+
+
+def _update_homepage(result, gameweek_events, players_df, team):
+    homepage_dir = team.homepage_dir
+    result_counts = pd.read_csv(homepage_dir / "result_counts.csv")
+    result_counts.loc[result_counts['Result'] == result['Result'], 'Count'] += 1
+    result_counts.to_csv(homepage_dir / "result_counts.csv", index=False)
+
+    goals_summary = pd.read_csv(homepage_dir / "goals_summary.csv")
+    goals_summary.loc[goals_summary['Metric'] == 'Scored', 'Goals'] += result['Score home']
+    goals_summary.loc[goals_summary['Metric'] == 'Conceded', 'Goals'] += result['Score away']
+    goals_summary.to_csv(homepage_dir / "goals_summary.csv", index=False)
+
+    recent_results = pd.read_csv(homepage_dir / "recent_results.csv")['Recent Results'].tolist()
+    recent_results = (recent_results + [result['Result']])[-5:]
+    pd.DataFrame({'Recent Results': recent_results}).to_csv(homepage_dir / "recent_results.csv", index=False)
+
+    write_latest_match(result['opponents'], result['Score home'], result['Score away'],
+                       scorers_summary(gameweek_events, players_df), team)
+
+
+def _appends_after(path, gameweek):
+    if not os.path.exists(path):
+        return True
+    gameweeks = load_arrays(path)['gameweeks']
+    return len(gameweeks) == 0 or gameweeks[-1] < gameweek
+
+
+def _append_team_stats(path, gameweek, gameweek_events):
+    """Add one gameweek column to a cumulative-goals file."""
+    gameweek_events = gameweek_events.dropna(subset=['Player'])
+    if os.path.exists(path):
+        arrays = load_arrays(path)
+    else:
+        arrays = {
+            'players': np.array([], dtype=str),
+            'gameweeks': np.array([], dtype='int64'),
+            'cumulative': np.zeros((0, 0), dtype='int64'),
+            'recorded': np.zeros((0, 0), dtype=bool),
+        }
+
+    # New players join in name order with an empty history
+    players = np.array(sorted(set(arrays['players']) | set(gameweek_events['Player'])), dtype=str)
+    old_rows = np.searchsorted(players, arrays['players'])
+    cumulative = np.zeros((len(players), len(arrays['gameweeks']) + 1), dtype='int64')
+    recorded = np.zeros(cumulative.shape, dtype=bool)
+    cumulative[old_rows, :-1] = arrays['cumulative']
+    recorded[old_rows, :-1] = arrays['recorded']
+
+    # Running totals carry forward; players in the gameweek add their goals
+    rows = np.searchsorted(players, gameweek_events['Player'].to_numpy(dtype=str))
+    if cumulative.shape[1] > 1:
+        cumulative[:, -1] = cumulative[:, -2]
+    cumulative[rows, -1] += gameweek_events['goals'].to_numpy()
+    recorded[rows, -1] = True
+
+    save_arrays(path, {
+        'players': players,
+        'gameweeks': np.append(arrays['gameweeks'], gameweek).astype('int64'),
+        'cumulative': cumulative,
+        'recorded': recorded,
+    })
+
+
+def _update_form(result, gameweek_events, team):
+    form = load_form(team)
+    player_events = {
+        player: (appeared, goals)
+        for player, appeared, goals in zip(gameweek_events['Player'], gameweek_events['appeared'], gameweek_events['goals'])
+        if isinstance(player, str)
+    }
+    write_form(advance_form(form, result, player_events), team)
+
+
+def _update_synergy(result, gameweek_events, sign, team):
+    played = gameweek_events.loc[gameweek_events['appeared'] == 1, 'Player'].dropna()
+    write_synergy(update_synergy(load_synergy(team), played, result, sign), team)
@@ -0,0 +1,168 @@
+# lineup_optimizer.py
+
+from itertools import combinations
+from math import comb
+import numpy as np
+import pandas as pd
+from model_registry import GOALS_AGAINST
+
+OUTFIELD_SIZE = 5
+# Above this many candidate lineups the search switches from exhaustive to beam
+MAX_EXHAUSTIVE_LINEUPS = 250_000
+BEAM_WIDTH = 2_000
+CHUNK_SIZE = 50_000
+MAX_GOALS = 40
+
+# Display label -> objective name
+OBJECTIVES = {
+    'Goal difference': 'goal_difference',
+    'Win probability': 'win_probability',
+}
+
+
+def outcome_probabilities(goals_for, goals_against, max_goals=MAX_GOALS):
+    """Win/draw/loss probabilities for independent Poisson goals for and against."""
+    k = np.arange(1, max_goals + 1)
+
+    def pmf(rate):
+        rate = np.asarray(rate, dtype=float)[:, None]
+        # pmf[k] = pmf[k-1] * rate / k, which stays finite for a zero rate
+        steps = np.cumprod(np.concatenate([np.ones_like(rate), rate / k], axis=1), axis=1)
+        return np.exp(-rate) * steps
+
+    pmf_for, pmf_against = pmf(goals_for), pmf(goals_against)
+    cdf_against = np.cumsum(pmf_against, axis=1)
+
+    draw = np.sum(pmf_for * pmf_against, axis=1)
+    win = np.sum(pmf_for[:, 1:] * cdf_against[:, :-1], axis=1)
+    return win, draw, 1 - win - draw
+
+
+class LineupOptimizer:
+    """Scores goalkeeper + five outfield lineups in vectorised batches.
+
+    Uses the stacked coefficient matrix: for a batch of lineups the feature
+    rows are built by index assignment, every player's expected goals come
+    from one matrix product and each lineup sums its own members' entries.
+    """
+
+    def __init__(self, stacked, goalkeepers, outfield_players):
+        self.stacked = stacked
+
+        # Only players with a goal model can be picked
+        self.goalkeepers = [player for player in goalkeepers if player in stacked.row]
+        self.outfield_players = [player for player in outfield_players if player in stacked.row]
+        self.players = self.outfield_players + self.goalkeepers
+
+        self.model_rows = np.array([stacked.row[player] for player in self.players])
+        self.feature_cols = np.array([
+            stacked.feature_index.get(f'{player}_appearance', -1) for player in self.players
+        ])
+        self.form_col = stacked.feature_index.get('Opponent_form')
+        self.player_coefficients = stacked.coefficients[self.model_rows]
+        self.player_intercepts = stacked.intercepts[self.model_rows]
+
+    def lineup_count(self):
+        return comb(len(self.outfield_players), OUTFIELD_SIZE) * len(self.goalkeepers)
+
+    def score(self, outfield, goalkeepers, opponent_form):
+        """Expected goals for/against of each lineup.
+
+        ``outfield`` is a (lineups x k) array of positions in
+        ``outfield_players`` and ``goalkeepers`` a (lineups,) array of
+        positions in ``goalkeepers``; k may be below five for partial lineups.
+        """
+        n_lineups = len(outfield)
+        members = np.zeros((n_lineups, len(self.players)))
+        np.put_along_axis(members, outfield, 1, axis=1)
+
+        # Player models see the outfield teammates, goals-against sees everyone
+        X_for = np.zeros((n_lineups, len(self.stacked.feature_names)))
+        has_feature = self.feature_cols >= 0
+        X_for[:, self.feature_cols[has_feature]] = members[:, has_feature]
+        if self.form_col is not None:
+            X_for[:, self.form_col] = opponent_form
+
+        members[np.arange(n_lineups), len(self.outfield_players) + goalkeepers] = 1
+        X_against = X_for.copy()
+        X_against[:, self.feature_cols[has_feature]] = members[:, has_feature]
+
+        expected = np.exp(X_for @ self.player_coefficients.T + self.player_intercepts)
+        goals_for = np.sum(expected * members, axis=1)
+
+        goals_against = np.zeros(n_lineups)
+        if GOALS_AGAINST in self.stacked.row:
+            row = self.stacked.row[GOALS_AGAINST]
+            goals_against = np.exp(X_against @ self.stacked.coefficients[row] + self.stacked.intercepts[row])
+
+        return goals_for, goals_against
+
+    def objective(self, goals_for, goals_against, objective):
+        if objective == 'win_probability':
+            return outcome_probabilities(goals_for, goals_against)[0]
+        return goals_for - goals_against
+
+    def best_lineups(self, opponent_form, objective='goal_difference', top_n=5):
+        """Top ``top_n`` lineups as a DataFrame, best first."""
+        if not self.goalkeepers or len(self.outfield_players) < OUTFIELD_SIZE:
+            return pd.DataFrame()
+
+        if self.lineup_count() <= MAX_EXHAUSTIVE_LINEUPS:
+            outfield, goalkeepers = self._exhaustive(opponent_form, objective, top_n)
+        else:
+            outfield, goalkeepers = self._beam(opponent_form, objective, top_n)
+
+        goals_for, goals_against = self.score(outfield, goalkeepers, opponent_form)
+        win, draw, loss = outcome_probabilities(goals_for, goals_against)
+        ranking = np.argsort(-self.objective(goals_for, goals_against, objective), kind='stable')
+
+        return pd.DataFrame([{
+            'Goalkeeper': self.goalkeepers[goalkeepers[i]],
+            'Outfield': [self.outfield_players[p] for p in outfield[i]],
+            'Goals for': goals_for[i],
+            'Goals against': goals_against[i],
+            'Goal difference': goals_for[i] - goals_against[i],
+            'Win probability': win[i],
+        } for i in ranking])
+
+    def _exhaustive(self, opponent_form, objective, top_n):
+        """Every C(outfield, 5) x goalkeeper lineup, scored in chunks."""
+        candidates = np.array(list(combinations(range(len(self.outfield_players)), OUTFIELD_SIZE)))
+        best_outfield, best_goalkeepers, best_values = [], [], []
+
+        for goalkeeper in range(len(self.goalkeepers)):
+            for start in range(0, len(candidates), CHUNK_SIZE):
+                outfield = candidates[start:start + CHUNK_SIZE]
+                goalkeepers = np.full(len(outfield), goalkeeper)
+                values = self.objective(*self.score(outfield, goalkeepers, opponent_form), objective)
+
+                keep = np.argsort(-values, kind='stable')[:top_n]
+                best_outfield.append(outfield[keep])
+                best_goalkeepers.append(goalkeepers[keep])
+                best_values.append(values[keep])
+
+        values = np.concatenate(best_values)
+        keep = np.argsort(-values, kind='stable')[:top_n]
+        return np.concatenate(best_outfield)[keep], np.concatenate(best_goalkeepers)[keep]
+
+    def _beam(self, opponent_form, objective, top_n):
+        """Grow lineups one player at a time, pruning to the best BEAM_WIDTH partials."""
+        n_outfield = len(self.outfield_players)
+        outfield = np.zeros((len(self.goalkeepers), 0), dtype=int)
+        goalkeepers = np.arange(len(self.goalkeepers))
+
+        for size in range(1, OUTFIELD_SIZE + 1):
+            # Extend each partial lineup with every higher-indexed player that
+            # still leaves enough players to complete it
+            last = outfield[:, -1] if size > 1 else np.full(len(outfield), -1)
+            candidates = np.arange(n_outfield - (OUTFIELD_SIZE - size))
+            parent, player = np.nonzero(candidates[None, :] > last[:, None])
+            outfield = np.column_stack([outfield[parent], player])
+            goalkeepers = goalkeepers[parent]
+
+            width = BEAM_WIDTH if size < OUTFIELD_SIZE else top_n
+            values = self.objective(*self.score(outfield, goalkeepers, opponent_form), objective)
+            keep = np.argsort(-values, kind='stable')[:width]
+            outfield, goalkeepers = outfield[keep], goalkeepers[keep]
+
+        return outfield, goalkeepers
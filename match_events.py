@@ -0,0 +1,60 @@
+# match_events.py
+"""Canonical long match-event table and adapters to the legacy wide layout.
+
+Players are integer-coded via players.csv; seasons are not. An event row keys
+on gameweek_id alone and the results table's Season column maps gameweeks to
+seasons, so the event table carries no season_id of its own.
+"""
+
+import pandas as pd
+
+# Canonical long layout: one row per player per gameweek they have a record for
+EVENT_COLUMNS = ['player_id', 'gameweek_id', 'appeared', 'goals']
+PLAYER_COLUMNS = ['player_id', 'Player']
+
+
+def gameweek_column(gameweek_id):
+    return f'Gameweek {int(gameweek_id)}'
+
+
+def wide_to_long(goals_df, appearances_df):
+    """Adapter from the legacy wide 'Gameweek N' matrices to (players, events).
+
+    Players are integer-coded in the order they appear in the goals file, with
+    any appearance-only players after them. An event row exists wherever the
+    appearance cell is filled in; missing goals count as zero.
+    """
+    names = list(dict.fromkeys(goals_df['Player'].tolist() + appearances_df['Player'].tolist()))
+    players = pd.DataFrame({'player_id': range(len(names)), 'Player': names})
+    player_ids = dict(zip(names, players['player_id']))
+
+    appeared = appearances_df.melt(id_vars=['Player'], var_name='gameweek', value_name='appeared')
+    goals = goals_df.melt(id_vars=['Player'], var_name='gameweek', value_name='goals')
+
+    events = appeared.merge(goals, on=['Player', 'gameweek'], how='left')
+    events = events.dropna(subset=['appeared'])
+    events['player_id'] = events['Player'].map(player_ids)
+    events['gameweek_id'] = events['gameweek'].str.split().str[-1].astype('int64')
+    events['appeared'] = events['appeared'].astype('int64')
+    events['goals'] = events['goals'].fillna(0).astype('int64')
+
+    events = events.sort_values(['gameweek_id', 'player_id'])[EVENT_COLUMNS]
+    return players, events.reset_index(drop=True)
+
+
+def long_to_wide(players_df, events_df, value):
+    """Adapter back to the wide layout: one 'Gameweek N' column of ``value`` per gameweek."""
+    wide = events_df.pivot(index='player_id', columns='gameweek_id', values=value)
+    wide = wide.reindex(index=players_df['player_id'], columns=sorted(events_df['gameweek_id'].unique()))
+    wide.columns = [gameweek_column(gw) for gw in wide.columns]
+
+    if not wide.isna().any().any():
+        wide = wide.astype('int64')
+
+    wide.insert(0, 'Player', players_df['Player'].values)
+    return wide.reset_index(drop=True)
+
+
+def with_names(events_df, players_df):
+    """Attach player names to event rows."""
+    return events_df.merge(players_df, on='player_id', how='left')
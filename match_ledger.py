@@ -0,0 +1,155 @@
+# match_ledger.py
+
+import argparse
+import hashlib
+import json
+import os
+import pandas as pd
+import const as c
+from file_utils import atomic_write, file_lock
+from match_events import EVENT_COLUMNS
+from teams import add_team_argument, get_team
+
+ADD_GAMEWEEK = 'add_gameweek'
+REMOVE_GAMEWEEK = 'remove_gameweek'
+
+
+def _checksum(payload):
+    body = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _plain(value):
+    # NumPy scalars -> Python scalars so the entry is JSON serialisable
+    return value.item() if hasattr(value, 'item') else value
+
+
+def gameweek_entry(result, events_df):
+    """Ledger entry that sets a gameweek's result row and its event rows."""
+    return {
+        'op': ADD_GAMEWEEK,
+        'gameweek': int(result['Gameweek']),
+        'result': {key: _plain(value) for key, value in dict(result).items()},
+        'events': {col: [int(value) for value in events_df[col]] for col in EVENT_COLUMNS},
+    }
+
+
+def removal_entry(gameweek):
+    return {'op': REMOVE_GAMEWEEK, 'gameweek': int(gameweek)}
+
+
+def append_entry(entry, path):
+    """Durably append one entry: a single write of one checksummed line, then fsync."""
+    line = json.dumps({**entry, 'checksum': _checksum(entry)}) + '\n'
+
+    with file_lock(path):
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            # Start on a fresh line if a previous writer died mid-line
+            if os.fstat(fd).st_size > 0 and not _ends_with_newline(path):
+                line = '\n' + line
+            os.write(fd, line.encode())
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _ends_with_newline(path):
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+
+def read_entries(path):
+    """Entries in write order. Torn or corrupt lines (a crash mid-append) are skipped."""
+    if not os.path.exists(path):
+        return []
+
+    entries = []
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(entry, dict) and entry.pop('checksum', None) == _checksum(entry):
+                entries.append(entry)
+    return entries
+
+
+def apply_entries(results_df, events_df, entries):
+    """Replay ledger entries over the snapshot tables.
+
+    Each entry replaces everything recorded for its gameweek, so replaying an
+    entry that is already in the snapshot changes nothing.
+    """
+    latest = {}
+    for entry in entries:
+        latest.pop(entry['gameweek'], None)
+        latest[entry['gameweek']] = entry
+
+    added = [entry for entry in latest.values() if entry['op'] == ADD_GAMEWEEK]
+    results_df = pd.concat(
+        [results_df[~results_df['Gameweek'].isin(latest)]]
+        + [pd.DataFrame([entry['result']]) for entry in added],
+        ignore_index=True
+    )
+    events_df = pd.concat(
+        [events_df[~events_df['gameweek_id'].isin(latest)]]
+        + [pd.DataFrame(entry['events'], columns=EVENT_COLUMNS) for entry in added],
+        ignore_index=True
+    ).astype('int64')
+
+    return results_df, events_df.sort_values(['gameweek_id', 'player_id']).reset_index(drop=True)
+
+
+def record_gameweek(result, events_df, team=None):
+    """Log a gameweek's result and events as one transaction; returns the entry."""
+    return _record(gameweek_entry(result, events_df), team)
+
+
+def record_removal(gameweek, team=None):
+    return _record(removal_entry(gameweek), team)
+
+
+def _record(entry, team):
+    path = get_team(team).ledger_path
+    append_entry(entry, path)
+    if len(read_entries(path)) >= c.LEDGER_COMPACT_EVERY:
+        compact(team)
+    return entry
+
+
+def compact(team=None):
+    """Fold the ledger into the CSV snapshots, then empty it.
+
+    Snapshots are replaced atomically one file at a time and the ledger is only
+    truncated afterwards; a crash in between leaves entries that replay to the
+    same tables. Returns the number of entries folded in.
+    """
+    from utils import DataLoader
+
+    loader = DataLoader(team)
+    path = loader.ledger_path
+    with file_lock(path):
+        entries = read_entries(path)
+        if not entries:
+            return 0
+
+        players_df = loader.players_data()
+        results_df, events_df = apply_entries(loader.snapshot_results(), loader.snapshot_events(), entries)
+
+        atomic_write(loader.data_folder / 'results_all.csv', lambda f: results_df.to_csv(f, index=False))
+        if not (loader.data_folder / 'players.csv').exists():
+            atomic_write(loader.data_folder / 'players.csv', lambda f: players_df.to_csv(f, index=False))
+        atomic_write(loader.data_folder / 'match_events.csv', lambda f: events_df.to_csv(f, index=False))
+        atomic_write(path, lambda f: None)
+
+    return len(entries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fold the match ledger into the CSV snapshots.")
+    add_team_argument(parser)
+    args = parser.parse_args()
+    print(f"✅ Compacted {compact(args.team)} ledger entries into the CSV snapshots")
@@ -0,0 +1,43 @@
+# match_simulator.py
+
+import numpy as np
+import pandas as pd
+import const as c
+
+DEFAULT_SIMULATIONS = 100_000
+
+
+def simulate_match(player_rates, goals_against_rate, simulations=DEFAULT_SIMULATIONS, seed=c.RANDOM_SEED):
+    """Monte Carlo scorelines from per-player and goals-against Poisson rates.
+
+    ``player_rates`` maps each selected player to their expected goals. All
+    draws come from one seeded generator in two vectorised calls, so the same
+    inputs always give the same distribution.
+
+    Returns a dict with ``win``/``draw``/``loss`` probabilities, a
+    ``scorelines`` DataFrame (Goals for, Goals against, Probability; most
+    likely first) and ``anytime_scorers`` (probability each player scores).
+    """
+    rng = np.random.default_rng(seed)
+    players = list(player_rates)
+
+    player_goals = rng.poisson(np.array([player_rates[player] for player in players]), size=(simulations, len(players)))
+    goals_for = player_goals.sum(axis=1)
+    goals_against = rng.poisson(goals_against_rate, size=simulations)
+
+    # Count each distinct scoreline via a single integer code
+    width = int(goals_against.max()) + 1
+    codes, counts = np.unique(goals_for * width + goals_against, return_counts=True)
+    scorelines = pd.DataFrame({
+        'Goals for': codes // width,
+        'Goals against': codes % width,
+        'Probability': counts / simulations,
+    }).sort_values('Probability', ascending=False, kind='stable').reset_index(drop=True)
+
+    return {
+        'win': float(np.mean(goals_for > goals_against)),
+        'draw': float(np.mean(goals_for == goals_against)),
+        'loss': float(np.mean(goals_for < goals_against)),
+        'scorelines': scorelines,
+        'anytime_scorers': pd.Series((player_goals > 0).mean(axis=0), index=players, name='Probability'),
+    }
@@ -0,0 +1,127 @@
+# match_store.py
+
+import hashlib
+import os
+import sqlite3
+from contextlib import closing
+from functools import cached_property
+import pandas as pd
+from match_events import EVENT_COLUMNS
+
+ALL_SEASONS = ('All seasons', 'All Seasons', 'All', None)
+# Part of the SQLite file name, so databases built with an older schema are rebuilt
+SCHEMA_VERSION = 2
+
+
+class PandasMatchStore:
+    """Query API over the in-memory tables.
+
+    Results are indexed by season up front and events by gameweek and by
+    player on first use, so a lookup is an index selection rather than a scan
+    of the whole history.
+    """
+
+    def __init__(self, results_df, events_df):
+        self.results_df = results_df
+        self.events_df = events_df
+        self.rows_by_season = results_df.groupby('Season').indices
+
+    @cached_property
+    def events_by_gameweek(self):
+        return self.events_df.sort_values(['gameweek_id', 'player_id']).set_index('gameweek_id', drop=False)
+
+    @cached_property
+    def events_by_player(self):
+        return self.events_df.sort_values(['player_id', 'gameweek_id']).set_index('player_id', drop=False)
+
+    def seasons(self):
+        return sorted(self.rows_by_season)
+
+    def season_gameweeks(self, season=None):
+        gameweeks = self.results_df['Gameweek']
+        if season not in ALL_SEASONS:
+            gameweeks = gameweeks.iloc[self.rows_by_season.get(season, [])]
+        return sorted(gameweeks.dropna().unique().tolist())
+
+    def gameweek_events(self, gameweeks):
+        gameweeks = [gw for gw in gameweeks if gw in self.events_by_gameweek.index]
+        return self.events_by_gameweek.loc[gameweeks, EVENT_COLUMNS].reset_index(drop=True)
+
+    def player_events(self, player_id, season=None):
+        if player_id not in self.events_by_player.index:
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+
+        events = self.events_by_player.loc[[player_id], EVENT_COLUMNS]
+        if season not in ALL_SEASONS:
+            events = events[events['gameweek_id'].isin(self.season_gameweeks(season))]
+        return events.reset_index(drop=True)
+
+
+class SQLiteMatchStore:
+    """Same query API, served from an indexed SQLite copy of the match data.
+
+    The database lives in the team's cache folder and is named after the
+    signatures of the files it was built from, so it is rebuilt only when
+    they change.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    @classmethod
+    def build(cls, cache_path, signature, results_df, events_df):
+        key = hashlib.sha1(repr((SCHEMA_VERSION, signature)).encode()).hexdigest()[:16]
+        db_path = cache_path / f"matches-{key}.sqlite"
+        if db_path.exists():
+            return cls(db_path)
+
+        os.makedirs(cache_path, exist_ok=True)
+        tmp_path = cache_path / f".matches-{key}.{os.getpid()}.tmp"
+        with closing(sqlite3.connect(tmp_path)) as conn:
+            results_df.to_sql('results', conn, index=False)
+            events_df.to_sql('events', conn, index=False)
+            conn.executescript('''
+                CREATE INDEX results_season_gameweek ON results ("Season", "Gameweek");
+                CREATE INDEX results_gameweek ON results ("Gameweek");
+                CREATE INDEX events_gameweek ON events (gameweek_id);
+                CREATE INDEX events_player_gameweek ON events (player_id, gameweek_id);
+            ''')
+            conn.commit()
+        os.replace(tmp_path, db_path)
+
+        # Remove databases built from older versions of the data
+        for stale in cache_path.glob("matches-*.sqlite"):
+            if stale != db_path:
+                stale.unlink(missing_ok=True)
+        return cls(db_path)
+
+    def _query(self, sql, params=()):
+        # One short-lived read-only connection per query: Streamlit reruns on many threads
+        with closing(sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)) as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def seasons(self):
+        return self._query('SELECT DISTINCT "Season" FROM results WHERE "Season" IS NOT NULL ORDER BY "Season"')['Season'].tolist()
+
+    def season_gameweeks(self, season=None):
+        if season in ALL_SEASONS:
+            df = self._query('SELECT DISTINCT "Gameweek" FROM results WHERE "Gameweek" IS NOT NULL ORDER BY "Gameweek"')
+        else:
+            df = self._query('SELECT DISTINCT "Gameweek" FROM results WHERE "Season" = ? ORDER BY "Gameweek"', (season,))
+        return df['Gameweek'].tolist()
+
+    def gameweek_events(self, gameweeks):
+        gameweeks = [int(gw) for gw in gameweeks]
+        return self._query(
+            f'SELECT {", ".join(EVENT_COLUMNS)} FROM events '
+            f'WHERE gameweek_id IN ({",".join("?" * len(gameweeks))}) ORDER BY gameweek_id, player_id',
+            gameweeks
+        )
+
+    def player_events(self, player_id, season=None):
+        sql = f'SELECT {", ".join(EVENT_COLUMNS)} FROM events WHERE player_id = ?'
+        params = [int(player_id)]
+        if season not in ALL_SEASONS:
+            sql += ' AND gameweek_id IN (SELECT "Gameweek" FROM results WHERE "Season" = ?)'
+            params.append(season)
+        return self._query(sql + ' ORDER BY gameweek_id', params)
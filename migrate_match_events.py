@@ -0,0 +1,36 @@
+# migrate_match_events.py
+
+import argparse
+import os
+from utils import DataLoader
+from match_events import wide_to_long
+from teams import add_team_argument
+
+
+def migrate_match_events(keep_wide=False, team=None):
+    loader = DataLoader(team)
+    goals_path = loader.data_folder / 'goals_all.csv'
+    appearances_path = loader.data_folder / 'appearances_all.csv'
+
+    if not goals_path.exists() or not appearances_path.exists():
+        print("Nothing to migrate: wide goals/appearances files not found.")
+        return
+
+    players_df, events_df = wide_to_long(loader.legacy_goals_data(), loader.legacy_appearances_data())
+
+    players_df.to_csv(loader.data_folder / 'players.csv', index=False)
+    events_df.to_csv(loader.data_folder / 'match_events.csv', index=False)
+
+    if not keep_wide:
+        os.remove(goals_path)
+        os.remove(appearances_path)
+
+    print(f"✅ Migrated {len(players_df)} players and {len(events_df)} match events to {loader.data_folder / 'match_events.csv'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the wide 'Gameweek N' CSVs into the long match-event table.")
+    parser.add_argument('--keep-wide', action='store_true', help="Leave goals_all.csv and appearances_all.csv in place.")
+    add_team_argument(parser)
+    args = parser.parse_args()
+    migrate_match_events(keep_wide=args.keep_wide, team=args.team)
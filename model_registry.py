@@ -0,0 +1,342 @@
+# model_registry.py
+
+import argparse
+import hashlib
+import os
+import sys
+import warnings
+from datetime import datetime
+from pathlib import Path
+from collections import OrderedDict
+import numpy as np
+import const as c
+from model_scorer import PoissonScorer, load_serving_models, save_serving_models
+from telemetry import cache_lookup, timed
+from teams import add_team_argument, get_team
+
+BUNDLE_FILE = 'model_bundle.joblib'
+BUNDLE_FORMAT_VERSION = 1
+# sklearn-free export of every model, preferred for serving
+SERVING_FILE = 'serving_models.npz'
+PLAYER_MODEL_SUFFIX = '_goal_model.joblib'
+JOINT_MODEL_FILE = 'player_goals_joint.joblib'
+GOALS_AGAINST_MODEL_FILE = 'goals_against_model.joblib'
+GOALS_AGAINST = 'goals_against'
+
+
+class ModelRegistry:
+    """Every forecasting model, held in memory once per server process."""
+
+    def __init__(self, player_models, goals_against_model, version=None, sources=None):
+        self.player_models = player_models
+        self.goals_against = goals_against_model
+        self.version = version
+        # Digests of the model files a bundle or export was built from
+        self.sources = sources
+        self._stacked = None
+
+    def player_model(self, player):
+        return self.player_models.get(player)
+
+    def goals_against_model(self):
+        return self.goals_against
+
+    def stacked(self):
+        """Coefficient-matrix view of every model, built on first use."""
+        if self._stacked is None:
+            self._stacked = StackedPoissonModels.from_registry(self)
+        return self._stacked
+
+    @classmethod
+    def from_model_files(cls, models_path=c.MODELS_PATH):
+        """Registry assembled from the individual ``.joblib`` files."""
+        from joblib import load
+
+        player_models = {
+            path.name[:-len(PLAYER_MODEL_SUFFIX)]: load(path)
+            for path in sorted(models_path.glob(f'*{PLAYER_MODEL_SUFFIX}'))
+        }
+        goals_against_path = models_path / GOALS_AGAINST_MODEL_FILE
+        goals_against_model = load(goals_against_path) if goals_against_path.exists() else None
+        return cls(player_models, goals_against_model)
+
+    @classmethod
+    def from_bundle(cls, bundle_path=c.MODELS_PATH / BUNDLE_FILE):
+        from joblib import load
+
+        bundle = load(bundle_path)
+        if bundle.get('format_version') != BUNDLE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported model bundle format {bundle.get('format_version')} in {bundle_path}")
+        return cls(bundle['player_models'], bundle['goals_against_model'], bundle['version'], bundle.get('sources'))
+
+    @classmethod
+    def from_serving_file(cls, serving_path=c.MODELS_PATH / SERVING_FILE):
+        """Registry of NumPy scorers from the ``.npz`` export; never imports sklearn or joblib."""
+        models, metadata = load_serving_models(serving_path)
+        feature_names = np.array(models['feature_names'], dtype=object)
+
+        scorers = {
+            name: PoissonScorer(feature_names[mask], coefficients[mask], intercept, metadata['link'])
+            for name, coefficients, intercept, mask in zip(
+                models['names'], models['coefficients'], models['intercepts'], models['masks']
+            )
+        }
+        goals_against_model = scorers.pop(GOALS_AGAINST, None)
+
+        registry = cls(scorers, goals_against_model, metadata['version'], metadata.get('sources'))
+        registry._stacked = StackedPoissonModels(
+            models['names'], models['feature_names'], models['coefficients'], models['intercepts']
+        )
+        return registry
+
+
+class StackedPoissonModels:
+    """Every fitted Poisson GLM as one coefficient matrix.
+
+    Row ``i`` holds model ``names[i]``'s coefficients laid out on a shared
+    feature index (zero where the model lacks a feature), so the expected
+    goals of all models for any number of feature rows is
+    ``exp(X @ coefficients.T + intercepts)``.
+    """
+
+    def __init__(self, names, feature_names, coefficients, intercepts):
+        self.names = list(names)
+        self.row = {name: i for i, name in enumerate(self.names)}
+        self.feature_names = list(feature_names)
+        self.feature_index = {feature: j for j, feature in enumerate(self.feature_names)}
+        self.coefficients = coefficients
+        self.intercepts = intercepts
+
+    @classmethod
+    def from_registry(cls, registry):
+        models = dict(registry.player_models)
+        if registry.goals_against is not None:
+            models[GOALS_AGAINST] = registry.goals_against
+
+        feature_names = list(dict.fromkeys(
+            feature for model in models.values() for feature in model.feature_names_in_
+        ))
+        feature_index = {feature: j for j, feature in enumerate(feature_names)}
+
+        coefficients = np.zeros((len(models), len(feature_names)))
+        intercepts = np.zeros(len(models))
+        for i, model in enumerate(models.values()):
+            columns = [feature_index[feature] for feature in model.feature_names_in_]
+            coefficients[i, columns] = model.coef_
+            intercepts[i] = model.intercept_
+
+        return cls(models.keys(), feature_names, coefficients, intercepts)
+
+    def feature_vector(self, players, opponent_form):
+        """One feature row: the given players' appearances plus the opponent form."""
+        x = np.zeros(len(self.feature_names))
+        for player in players:
+            j = self.feature_index.get(f'{player}_appearance')
+            if j is not None:
+                x[j] = 1
+        if 'Opponent_form' in self.feature_index:
+            x[self.feature_index['Opponent_form']] = opponent_form
+        return x
+
+    def predict(self, X):
+        """Expected goals of every model for each row of ``X`` (rows x models)."""
+        return np.exp(np.atleast_2d(X) @ self.coefficients.T + self.intercepts)
+
+    def predict_lineup(self, outfield_players, goalkeepers, opponent_form):
+        """Expected goals of each player in a lineup, and against it, in one matmul.
+
+        Player models see the outfield teammates; the goals-against model sees
+        the whole lineup including the goalkeepers. Returns ``({player:
+        expected goals}, expected goals against)``, leaving out players without
+        a model and giving None against when there is no goals-against model.
+        """
+        expected_goals = self.predict(np.stack([
+            self.feature_vector(outfield_players, opponent_form),
+            self.feature_vector(list(outfield_players) + list(goalkeepers), opponent_form),
+        ]))
+
+        players = {
+            player: expected_goals[0, self.row[player]]
+            for player in list(outfield_players) + list(goalkeepers) if player in self.row
+        }
+        goals_against = expected_goals[1, self.row[GOALS_AGAINST]] if GOALS_AGAINST in self.row else None
+        return players, goals_against
+
+
+def check_linear_predictor(registry=None, lineups=200, team=None):
+    """Compare the stacked predictor against ``model.predict`` on random lineups."""
+    import pandas as pd
+
+    registry = registry or ModelRegistry.from_model_files(get_team(team).models_path)
+    stacked = registry.stacked()
+    rng = np.random.default_rng(c.RANDOM_SEED)
+
+    X = rng.integers(0, 2, size=(lineups, len(stacked.feature_names))).astype(float)
+    if 'Opponent_form' in stacked.feature_index:
+        X[:, stacked.feature_index['Opponent_form']] = rng.choice([0, 33, 66, 100], size=lineups)
+    batched = stacked.predict(X)
+
+    mismatched = []
+    for name, i in stacked.row.items():
+        model = registry.goals_against if name == GOALS_AGAINST else registry.player_models[name]
+        frame = pd.DataFrame(X, columns=stacked.feature_names)[list(model.feature_names_in_)]
+        if not np.allclose(batched[:, i], model.predict(frame), rtol=1e-9, atol=1e-12):
+            mismatched.append(name)
+
+    if mismatched:
+        print(f"❌ Stacked predictions differ from model.predict for: {', '.join(mismatched)}")
+        return False
+
+    print(f"✅ Stacked predictions match model.predict for {len(stacked.names)} models on {lineups} lineups")
+    return True
+
+
+def check_serving_models(lineups=200, team=None):
+    """Compare the ``.npz`` export's predictions against the ``.joblib`` models."""
+    models_path = get_team(team).models_path
+    expected = ModelRegistry.from_model_files(models_path).stacked()
+    served = ModelRegistry.from_serving_file(models_path / SERVING_FILE).stacked()
+
+    if sorted(expected.names) != sorted(served.names):
+        print(f"❌ {SERVING_FILE} has models {sorted(served.names)}, the model files have {sorted(expected.names)}")
+        return False
+
+    rng = np.random.default_rng(c.RANDOM_SEED)
+    X = rng.integers(0, 2, size=(lineups, len(expected.feature_names))).astype(float)
+    if 'Opponent_form' in expected.feature_index:
+        X[:, expected.feature_index['Opponent_form']] = rng.choice([0, 33, 66, 100], size=lineups)
+
+    # Lay the same lineups out on the export's feature index
+    X_served = np.zeros((lineups, len(served.feature_names)))
+    for feature, j in expected.feature_index.items():
+        if feature in served.feature_index:
+            X_served[:, served.feature_index[feature]] = X[:, j]
+
+    columns = [expected.row[name] for name in served.names]
+    if not np.allclose(served.predict(X_served), expected.predict(X)[:, columns], rtol=1e-9, atol=1e-12):
+        print(f"❌ {SERVING_FILE} predictions differ from the model files")
+        return False
+
+    print(f"✅ {SERVING_FILE} matches the model files for {len(served.names)} models on {lineups} lineups")
+    return True
+
+
+def bundle_path(team=None):
+    return get_team(team).models_path / BUNDLE_FILE
+
+
+@timed('models.bundle')
+def build_bundle(team=None):
+    """Pack every player model and the goals-against model into one versioned file.
+
+    The same version is exported to ``SERVING_FILE`` for sklearn-free serving.
+    """
+    from joblib import dump
+
+    models_path = get_team(team).models_path
+    bundle_path = models_path / BUNDLE_FILE
+    sources = model_file_digests(models_path)
+    registry = ModelRegistry.from_model_files(models_path)
+    version = datetime.now().strftime('%Y%m%d%H%M%S')
+
+    tmp_path = bundle_path.with_name(f'.{bundle_path.name}.tmp')
+    dump({
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'version': version,
+        'player_models': registry.player_models,
+        'goals_against_model': registry.goals_against,
+        'sources': sources,
+    }, tmp_path)
+    os.replace(tmp_path, bundle_path)
+    export_serving_models(registry, models_path / SERVING_FILE, version, sources)
+
+    print(f"✅ Bundled {len(registry.player_models)} player models into {bundle_path} (version {version})")
+    return bundle_path
+
+
+def export_serving_models(registry, serving_path, version, sources=None):
+    stacked = registry.stacked()
+    models = dict(registry.player_models)
+    if registry.goals_against is not None:
+        models[GOALS_AGAINST] = registry.goals_against
+
+    masks = np.zeros(stacked.coefficients.shape, dtype=bool)
+    for name, model in models.items():
+        masks[stacked.row[name], [stacked.feature_index[feature] for feature in model.feature_names_in_]] = True
+    save_serving_models(serving_path, stacked.names, stacked.feature_names, stacked.coefficients,
+                        stacked.intercepts, masks, version, sources=sources)
+
+
+def _model_files(models_path):
+    return sorted(path for path in models_path.glob('*.joblib') if path.name != BUNDLE_FILE)
+
+
+def model_file_digests(models_path):
+    """``{file name: sha256}`` of the trained ``.joblib`` models, recorded in the bundle and export."""
+    return {path.name: hashlib.sha256(path.read_bytes()).hexdigest() for path in _model_files(models_path)}
+
+
+def _source_signature(models_path):
+    # Every file the registry may be loaded from, so a retrain without a re-export is noticed too
+    paths = [path for path in [models_path / SERVING_FILE, models_path / BUNDLE_FILE] if path.exists()]
+    paths += _model_files(models_path)
+    return tuple((path.name, path.stat().st_mtime_ns, path.stat().st_size) for path in paths)
+
+
+# Per-team (signature, registry), least recently used first; at most MAX_CACHED_TEAMS are kept.
+# A team's entry is replaced when its models change, so stale versions never crowd out other teams.
+_REGISTRIES = OrderedDict()
+
+
+@timed('models.load')
+def _load_registry(models_path):
+    """The serving export, else the bundle, else the model files.
+
+    An export or bundle is only used while the model files it was built from
+    are unchanged (or absent, as in a serving-only deploy); after a retrain
+    without a re-export the model files are served instead, with a warning.
+    """
+    digests = model_file_digests(models_path)
+    stale = []
+    for file, load in [(SERVING_FILE, ModelRegistry.from_serving_file), (BUNDLE_FILE, ModelRegistry.from_bundle)]:
+        if not (models_path / file).exists():
+            continue
+        registry = load(models_path / file)
+        if not digests or registry.sources == digests:
+            return registry
+        stale.append(file)
+
+    if stale:
+        warnings.warn(f"{' and '.join(stale)} in {models_path} predate the trained models; serving the model files "
+                      f"until they are re-exported (make bundle_models)")
+    return ModelRegistry.from_model_files(models_path)
+
+
+def get_registry(team=None):
+    """Shared registry for ``team``, reloaded only when its models on disk change."""
+    models_path = get_team(team).models_path
+    signature = _source_signature(models_path)
+    cached = _REGISTRIES.pop(models_path, None)
+    hit = cached is not None and cached[0] == signature
+    cache_lookup('models.registry', hit)
+    if not hit:
+        cached = (signature, _load_registry(models_path))
+
+    _REGISTRIES[models_path] = cached
+    while len(_REGISTRIES) > c.MAX_CACHED_TEAMS:
+        _REGISTRIES.popitem(last=False)
+    return cached[1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bundle the trained models, or check the stacked predictor.")
+    parser.add_argument('--check', action='store_true',
+                        help=f"Compare stacked predictions with model.predict, and {SERVING_FILE} with the model files.")
+    add_team_argument(parser)
+    args = parser.parse_args()
+    if args.check:
+        ok = check_linear_predictor(team=args.team)
+        if (get_team(args.team).models_path / SERVING_FILE).exists():
+            ok = check_serving_models(team=args.team) and ok
+        sys.exit(0 if ok else 1)
+    build_bundle(args.team)
@@ -0,0 +1,58 @@
+# model_scorer.py
+
+import json
+import numpy as np
+from file_utils import load_arrays, save_arrays
+
+SERVING_FORMAT_VERSION = 1
+LINKS = {'log': np.exp, 'identity': lambda eta: eta}
+
+
+class PoissonScorer:
+    """A fitted GLM as plain arrays, scored with NumPy alone.
+
+    Has the fitted-estimator attributes the registry reads from a
+    PoissonRegressor (``feature_names_in_``, ``coef_``, ``intercept_``,
+    ``predict``), so it stands in for one without importing sklearn.
+    """
+
+    def __init__(self, feature_names, coef, intercept, link='log'):
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.coef_ = np.asarray(coef, dtype=float)
+        self.intercept_ = float(intercept)
+        self.link = link
+
+    def predict(self, X):
+        # A DataFrame is reordered to the model's columns
+        if hasattr(X, 'columns'):
+            X = X[list(self.feature_names_in_)]
+        return LINKS[self.link](np.asarray(X, dtype=float) @ self.coef_ + self.intercept_)
+
+
+def save_serving_models(path, names, feature_names, coefficients, intercepts, masks, version, link='log', sources=None):
+    """Write stacked models as an ``.npz`` of arrays plus a JSON metadata string.
+
+    Row ``i`` of ``coefficients`` is model ``names[i]`` on the shared
+    ``feature_names``; ``masks[i]`` marks the features that model was fit on.
+    ``sources`` maps each model file the export was built from to its digest.
+    """
+    metadata = {'format_version': SERVING_FORMAT_VERSION, 'version': version, 'link': link, 'sources': sources or {}}
+    save_arrays(path, {
+        'names': np.asarray(names, dtype=str),
+        'feature_names': np.asarray(feature_names, dtype=str),
+        'coefficients': np.asarray(coefficients, dtype=float),
+        'intercepts': np.asarray(intercepts, dtype=float),
+        'masks': np.asarray(masks, dtype=bool),
+        'metadata': np.asarray(json.dumps(metadata)),
+    }, compressed=False)
+
+
+def load_serving_models(path):
+    models = load_arrays(path)
+
+    metadata = json.loads(str(models.pop('metadata')))
+    if metadata.get('format_version') != SERVING_FORMAT_VERSION:
+        raise ValueError(f"Unsupported serving model format {metadata.get('format_version')} in {path}")
+    models['names'] = models['names'].tolist()
+    models['feature_names'] = models['feature_names'].tolist()
+    return models, metadata
@@ -1,46 +1,21 @@
 import streamlit as st
 import pandas as pd
-import hmac
 from datetime import datetime
+from utils import DataLoader, SelectTeam, check_password
+from incremental_update import apply_new_gameweek, remove_gameweek
+from match_ledger import apply_entries, record_gameweek, record_removal
+from telemetry import page_run
 
-def check_password():
-    """Returns `True` if the user has the correct password."""
-    def password_entered():
-        """Checks whether a password entered by the user is correct."""
-        if hmac.compare_digest(st.session_state["password"], st.secrets["password"]):
-            st.session_state["password_correct"] = True
-            del st.session_state["password"]
-        else:
-            st.session_state["password_correct"] = False
-
-    if st.session_state.get("password_correct", False):
-        return True
-
-    st.text_input(
-        "Enter the password to visit the manager's office:", type="password", on_change=password_entered, key="password"
-    )
-    if "password_correct" in st.session_state:
-        st.error("😕 Blimey, that was further off than the average Jake shot!")
-    return False
-
-# Function to load the CSV files
-def load_data():
-    results_df = pd.read_csv('data/results_all.csv')
-    goals_df = pd.read_csv('data/goals_all.csv')
-    appearances_df = pd.read_csv('data/appearances_all.csv')
-    return results_df, goals_df, appearances_df
-
-# Function to save data back to CSV
-def save_data(results_df, goals_df, appearances_df):
-    results_df.to_csv('data/results_all.csv', index=False)
-    goals_df.to_csv('data/goals_all.csv', index=False)
-    appearances_df.to_csv('data/appearances_all.csv', index=False)
+# Function to load the cached match data
+def load_data(team):
+    loader = DataLoader(team)
+    return loader.results_data(), loader.players_data(), loader.match_events()
 
 # Admin page
-def admin_page():
-    st.title("Manager's Office - Add New Result")
+def admin_page(team):
+    st.title(f"Manager's Office - Add New Result ({team.name})")
 
-    results_df, goals_df, appearances_df = load_data()
+    results_df, players_df, events_df = load_data(team)
 
     # Add new result section
     st.header('Add New Result')
@@ -57,7 +32,7 @@ def admin_page():
     score_home = st.number_input('Home Team Score', min_value=0, key='score_home')
     score_away = st.number_input('Away Team Score', min_value=0, key='score_away')
 
-    players = sorted(set(appearances_df['Player']).union(goals_df['Player']))
+    players = sorted(players_df['Player'])
     players_played = st.multiselect('Select Players Who Played', options=players, key='players_played')
     goals_scored = {}
     for player in players_played:
@@ -65,7 +40,7 @@ def admin_page():
 
     if st.button('Add New Result'):
         # Add result to results_df
-        new_result = pd.DataFrame([{
+        new_result = {
             'Gameweek': gameweek,
             'Season': season,
             'Date': date.strftime('%d/%m/%y'),
@@ -77,34 +52,21 @@ def admin_page():
             'opponent_form': opponent_form,
             'Score home': score_home,
             'Score away': score_away
-        }])
-        results_df = pd.concat([results_df, new_result], ignore_index=True)
-
-        gameweek_col = f'Gameweek {gameweek}'
-
-        # Ensure all players from both DataFrames are included
-        all_players = sorted(set(players_played).union(appearances_df['Player']).union(goals_df['Player']))
-
-        for player in all_players:
-            if player not in appearances_df['Player'].values:
-                appearances_df = pd.concat([appearances_df, pd.DataFrame([{'Player': player}])], ignore_index=True)
-            if player not in goals_df['Player'].values:
-                goals_df = pd.concat([goals_df, pd.DataFrame([{'Player': player}])], ignore_index=True)
-
-        # Ensure column exists and default to 0
-        if gameweek_col not in appearances_df.columns:
-            appearances_df[gameweek_col] = 0
-        if gameweek_col not in goals_df.columns:
-            goals_df[gameweek_col] = 0
-
-        # Set 1 for those who played, 0 otherwise
-        appearances_df[gameweek_col] = appearances_df['Player'].apply(lambda x: 1 if x in players_played else 0)
-
-        # Set goals for those who scored, 0 otherwise
-        goals_df[gameweek_col] = goals_df['Player'].apply(lambda x: goals_scored.get(x, 0))
-
-        # Save updates
-        save_data(results_df, goals_df, appearances_df)
+        }
+
+        # One event row per squad player: 1/0 appearance and their goals
+        new_events = pd.DataFrame({
+            'player_id': players_df['player_id'],
+            'gameweek_id': gameweek,
+            'appeared': players_df['Player'].isin(players_played).astype(int),
+            'goals': players_df['Player'].map(goals_scored).fillna(0).astype(int)
+        })
+
+        # Log the gameweek as one ledger entry, then fold it into the derived stats
+        replaced = gameweek in set(results_df['Gameweek']) or gameweek in set(events_df['gameweek_id'])
+        entry = record_gameweek(new_result, new_events, team)
+        results_df, events_df = apply_entries(results_df, events_df, [entry])
+        apply_new_gameweek(results_df, events_df, players_df, gameweek, replaced=replaced, team=team)
         st.success('New result added successfully!')
 
     # Remove gameweek section
@@ -115,15 +77,11 @@ def admin_page():
     if selected_gameweek:
         st.warning('Warning: This action cannot be undone!')
         if st.button('Remove Selected Gameweek'):
-            gameweek_col = f'Gameweek {selected_gameweek}'
-            results_df = results_df[results_df['Gameweek'] != selected_gameweek]
-            if gameweek_col in goals_df.columns:
-                goals_df = goals_df.drop(columns=[gameweek_col])
-            if gameweek_col in appearances_df.columns:
-                appearances_df = appearances_df.drop(columns=[gameweek_col])
-            save_data(results_df, goals_df, appearances_df)
+            record_removal(selected_gameweek, team)
+            remove_gameweek(results_df, events_df, players_df, selected_gameweek, team)
             st.success(f'Gameweek {selected_gameweek} removed successfully!')
 
 # Display admin page only if the user enters the correct password
-if check_password():
-    admin_page()
+with page_run('managers_office'):
+    if check_password():
+        admin_page(SelectTeam().team)
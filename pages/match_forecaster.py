@@ -1,29 +1,39 @@
 import streamlit as st
 import pandas as pd
-import os
-from PIL import Image
-from joblib import load
-from utils import DataLoader
+from utils import DataLoader, SelectTeam, load_player_thumbnail
+from model_registry import GOALS_AGAINST, get_registry
+from lineup_optimizer import OBJECTIVES, LineupOptimizer
+from match_simulator import DEFAULT_SIMULATIONS, simulate_match
+from telemetry import page_run, timed
 
 
 class ScorePredictorApp:
-    def __init__(self):
-        self.loader = DataLoader()
-        self.players_df = self.loader.goals_data()
-        self.players = self.players_df['Player'].unique()
+    def __init__(self, team):
+        self.team = team
+        self.loader = DataLoader(team)
+        self.players = self.loader.players_data()['Player'].unique()
 
-        # Define the goalkeepers and outfield players
-        self.goalkeepers = ['Jack J', 'Keenan']
+        # Goalkeepers come from the team's entry in data/teams.json
+        self.goalkeepers = [player for player in team.goalkeepers if player in self.players]
         self.outfield_players = [player for player in self.players if player not in self.goalkeepers]
 
         self.selected_goalkeeper = st.session_state.get('selected_goalkeeper', None)
+        if self.selected_goalkeeper not in self.goalkeepers:
+            self.selected_goalkeeper = None  # Picked for another team
         self.selected_players = [p for p in st.session_state.get('selected_players', []) if p in self.outfield_players]
 
         self.form_mapping = {"bad": 0, "average": 33, "good": 66, "great": 100}
 
+        # Loaded once per server process and team, shared by every session
+        try:
+            self.registry = get_registry(team)
+        except Exception as error:
+            # Unreadable models (e.g. pickled by another sklearn version) should not take the page down
+            self.registry = None
+            self.registry_error = error
+
     def load_player_image(self, player_name):
-        image_path = f'player_images/{player_name}.png'
-        return Image.open(image_path) if os.path.exists(image_path) else None
+        return load_player_thumbnail(player_name, width=50, team=self.team)
 
     def display_player_selection(self):
         st.title("Select 6 Players for Score Prediction")
@@ -82,59 +92,68 @@ class ScorePredictorApp:
                     if img:
                         st.image(img, caption=player, width=50)
 
-    def predict_goals(self):
-        predictions = {}
+    @timed('match_forecaster.predict')
+    def predict_all(self):
+        """Expected goals for the selected players and against, in one matmul.
 
-        all_players = self.selected_players + [self.selected_goalkeeper]
+        Player models see the outfield teammates; the goals-against model sees
+        the whole selection including the goalkeeper.
+        """
+        expected_goals, goals_against = self.registry.stacked().predict_lineup(
+            self.selected_players, [self.selected_goalkeeper], st.session_state.opponent_form_value
+        )
 
-        for player in all_players:
-            model_path = f"models/{player}_goal_model.joblib"
-            if not os.path.exists(model_path):
+        predictions = {}
+        for player in self.selected_players + [self.selected_goalkeeper]:
+            if player not in expected_goals:
                 st.error(f"Model not found for {player}")
                 continue
+            predictions[player] = round(expected_goals[player], 2)
 
-            model = load(model_path)
-            all_features = model.feature_names_in_
-            features = {feat: 0 for feat in all_features}
-
-            for teammate in self.selected_players:
-                if teammate != player:
-                    col = f"{teammate}_appearance"
-                    if col in features:
-                        features[col] = 1
-
-            if 'Opponent_form' in features:
-                features['Opponent_form'] = st.session_state.opponent_form_value
-
-            X = pd.DataFrame([features])
-            X = X.reindex(columns=model.feature_names_in_, fill_value=0)
-            predicted_goals = model.predict(X)[0]
-            predictions[player] = round(predicted_goals, 2)
-
-        return predictions
-
-    def predict_goals_against(self):
-        model_path = "models/goals_against_model.joblib"
-        if not os.path.exists(model_path):
+        if goals_against is None:
             st.error("Goals against model not found.")
-            return None
+        else:
+            predictions[GOALS_AGAINST] = round(goals_against, 2)
 
-        model = load(model_path)
-        all_features = model.feature_names_in_
-        features = {feat: 0 for feat in all_features}
+        return predictions
 
-        for player in self.selected_players + [self.selected_goalkeeper]:
-            col = f"{player}_appearance"
-            if col in features:
-                features[col] = 1
+    def display_lineup_suggestions(self):
+        """Search every lineup for the best predicted outcome against the chosen opponent form."""
+        with st.expander("Suggest a lineup"):
+            objective = OBJECTIVES[st.radio("Optimise for", options=list(OBJECTIVES.keys()), horizontal=True)]
+
+            # Suggestions only stand for the inputs they were searched with
+            inputs = (self.team.slug, st.session_state.opponent_form_value, objective)
+            if st.button("Suggest lineup"):
+                optimizer = LineupOptimizer(self.registry.stacked(), self.goalkeepers, self.outfield_players)
+                st.session_state.suggested_lineups = (
+                    inputs, optimizer.best_lineups(st.session_state.opponent_form_value, objective=objective)
+                )
+
+            suggested_inputs, suggestions = st.session_state.get('suggested_lineups', (None, None))
+            if suggested_inputs != inputs:
+                return
+            if suggestions.empty:
+                st.warning("Not enough players with trained models to build a lineup.")
+                return
+
+            table = suggestions.assign(Outfield=suggestions['Outfield'].str.join(', '))
+            st.dataframe(
+                table.style.format({
+                    'Goals for': '{:.2f}', 'Goals against': '{:.2f}',
+                    'Goal difference': '{:+.2f}', 'Win probability': '{:.0%}'
+                }),
+                hide_index=True, use_container_width=True
+            )
 
-        if 'Opponent_form' in features:
-            features['Opponent_form'] = st.session_state.opponent_form_value
+            best = suggestions.iloc[0]
+            st.button("Use best lineup", on_click=self.use_lineup, args=(best['Goalkeeper'], best['Outfield']))
 
-        X = pd.DataFrame([features])
-        X = X.reindex(columns=model.feature_names_in_, fill_value=0)
-        predicted_goals_against = model.predict(X)[0]
-        return round(predicted_goals_against, 2)
+    @staticmethod
+    def use_lineup(goalkeeper, outfield_players):
+        # Runs before the rerun, so the selection widgets pick these up as defaults
+        st.session_state.selected_goalkeeper = goalkeeper
+        st.session_state.selected_players = list(outfield_players)
 
     def display_scoreboard(self, total_goals_for, goals_against):
         """Displays the score in a football scoreboard style."""
@@ -183,13 +202,52 @@ class ScorePredictorApp:
         </div>
         """, unsafe_allow_html=True)
 
+    @timed('match_forecaster.simulate')
+    def display_simulation(self, predictions, goals_against):
+        """Win/draw/loss odds, likely scorelines and anytime scorers from simulated matches."""
+        simulation = simulate_match(predictions, goals_against)
+
+        st.subheader(f"Simulated outcomes ({DEFAULT_SIMULATIONS:,} matches)")
+        win_col, draw_col, loss_col = st.columns(3)
+        win_col.metric("Win", f"{simulation['win']:.0%}")
+        draw_col.metric("Draw", f"{simulation['draw']:.0%}")
+        loss_col.metric("Loss", f"{simulation['loss']:.0%}")
+
+        scorelines_col, scorers_col = st.columns(2)
+        with scorelines_col:
+            st.markdown("**Most likely scorelines**")
+            scorelines = simulation['scorelines'].head(10)
+            st.dataframe(
+                pd.DataFrame({
+                    'Score': scorelines['Goals for'].astype(str) + ' - ' + scorelines['Goals against'].astype(str),
+                    'Probability': scorelines['Probability'],
+                }).style.format({'Probability': '{:.1%}'}),
+                hide_index=True, use_container_width=True
+            )
+        with scorers_col:
+            st.markdown("**Anytime scorer**")
+            scorers = simulation['anytime_scorers'].sort_values(ascending=False)
+            st.dataframe(
+                scorers.rename_axis('Player').reset_index().style.format({'Probability': '{:.0%}'}),
+                hide_index=True, use_container_width=True
+            )
+
     def run(self):
+        if self.registry is None or not self.registry.stacked().names:
+            st.title("Match Forecaster")
+            st.warning(f"No forecasting models are available for {self.team.name} yet. "
+                       "Train them with `make build` (or `make train_all bundle_models`).")
+            if self.registry is None:
+                st.caption(f"The stored models could not be loaded: {self.registry_error!r}")
+            return
+
         self.display_player_selection()
+        self.display_lineup_suggestions()
 
         if len(self.selected_players) == 5 and self.selected_goalkeeper:
             if st.button("Predict Score"):
-                predictions = self.predict_goals()
-                goals_against = self.predict_goals_against()
+                predictions = self.predict_all()
+                goals_against = predictions.pop(GOALS_AGAINST, None)
 
                 # Sum up goals first, then round the total
                 total_goals_for = sum(predictions.values())
@@ -198,11 +256,13 @@ class ScorePredictorApp:
                 # Display score in football scoreboard format
                 if goals_against is not None:
                     self.display_scoreboard(total_goals_for, goals_against)
+                    self.display_simulation(predictions, goals_against)
 
 
 def run():
-    app = ScorePredictorApp()
-    app.run()
+    with page_run('match_forecaster'):
+        app = ScorePredictorApp(SelectTeam().team)
+        app.run()
 
 
 run()
@@ -0,0 +1,68 @@
+import streamlit as st
+import plotly.graph_objects as go
+from utils import SelectTeam
+from generate_synergy_data import load_synergy, pair_table
+from telemetry import page_run
+
+TABLE_ROWS = 10
+
+class PartnershipsApp:
+    def __init__(self, team):
+        self.team = team
+
+    def display_partnerships(self, pairs, title, ascending):
+        st.subheader(title)
+        ranked = pairs.sort_values(['Win Rate', 'Goal Difference Per Game', 'Games Together'],
+                                   ascending=[ascending, ascending, False])
+        st.dataframe(
+            ranked.head(TABLE_ROWS).reset_index(drop=True),
+            column_config={
+                'Win Rate': st.column_config.NumberColumn(format="%.0f%%"),
+                'Goal Difference Per Game': st.column_config.NumberColumn(format="%.2f"),
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+
+    def display_heatmap(self, arrays, min_games):
+        games = arrays['games']
+        win_rate = (arrays['wins'] / games.clip(min=1) * 100).round()
+        win_rate[games < min_games] = float('nan')
+
+        fig = go.Figure(go.Heatmap(
+            z=win_rate,
+            x=arrays['players'],
+            y=arrays['players'],
+            customdata=games,
+            hovertemplate="%{y} & %{x}<br>Win rate: %{z:.0f}%<br>Games together: %{customdata}<extra></extra>",
+            colorscale='RdYlGn',
+            zmin=0,
+            zmax=100
+        ))
+        fig.update_layout(title="Win Rate Together", height=600, yaxis=dict(autorange='reversed'))
+        st.plotly_chart(fig, use_container_width=True)
+
+    def run(self):
+        st.title("Partnerships")
+        st.write("How the team does with each pair of players on the pitch together.")
+
+        arrays = load_synergy(self.team)
+        min_games = st.slider("Minimum games together", 1, 20, 5, key='partnerships_min_games')
+        pairs = pair_table(arrays, min_games)
+
+        if pairs.empty:
+            st.write("No pairs have played that many games together.")
+            return
+
+        col1, col2 = st.columns(2)
+        with col1:
+            self.display_partnerships(pairs, "Top Partnerships", ascending=False)
+        with col2:
+            self.display_partnerships(pairs, "Bottom Partnerships", ascending=True)
+
+        self.display_heatmap(arrays, min_games)
+
+if __name__ == "__main__":
+    with page_run('partnerships'):
+        app = PartnershipsApp(SelectTeam().team)
+        app.run()
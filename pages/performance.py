@@ -0,0 +1,92 @@
+import time
+import streamlit as st
+import pandas as pd
+from utils import check_password
+from telemetry import PAGE_PREFIX, page_run, read_events, summarise
+
+WINDOWS = {'Last hour': 3600, 'Last day': 24 * 3600, 'Last week': 7 * 24 * 3600, 'All kept': None}
+
+class PerformanceApp:
+    def load_events(self, window):
+        seconds = WINDOWS[window]
+        return read_events(since=None if seconds is None else time.time() - seconds)
+
+    def display_page_reruns(self, timings):
+        st.subheader("Page Reruns")
+        st.dataframe(
+            pd.DataFrame([
+                {'Page': name[len(PAGE_PREFIX):], 'Reruns': timing['count'],
+                 'p50 (ms)': timing['p50_s'] * 1000, 'p95 (ms)': timing['p95_s'] * 1000}
+                for name, timing in timings.items() if name.startswith(PAGE_PREFIX)
+            ], columns=['Page', 'Reruns', 'p50 (ms)', 'p95 (ms)']),
+            column_config={
+                'p50 (ms)': st.column_config.NumberColumn(format="%.1f"),
+                'p95 (ms)': st.column_config.NumberColumn(format="%.1f"),
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+
+    def display_latencies(self, timings):
+        st.subheader("Latencies")
+        st.dataframe(
+            pd.DataFrame([
+                {'Operation': name, 'Calls': timing['count'], 'p50 (ms)': timing['p50_s'] * 1000,
+                 'p95 (ms)': timing['p95_s'] * 1000, 'Total (s)': timing['total_s']}
+                for name, timing in timings.items() if not name.startswith(PAGE_PREFIX)
+            ], columns=['Operation', 'Calls', 'p50 (ms)', 'p95 (ms)', 'Total (s)']),
+            column_config={
+                'p50 (ms)': st.column_config.NumberColumn(format="%.1f"),
+                'p95 (ms)': st.column_config.NumberColumn(format="%.1f"),
+                'Total (s)': st.column_config.NumberColumn(format="%.2f"),
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+
+    def display_caches(self, caches, counters):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("Cache Hit Ratios")
+            st.dataframe(
+                pd.DataFrame([
+                    {'Cache': name, 'Lookups': cache['lookups'], 'Hit Ratio': cache['hit_ratio'] * 100}
+                    for name, cache in caches.items()
+                ], columns=['Cache', 'Lookups', 'Hit Ratio']),
+                column_config={'Hit Ratio': st.column_config.NumberColumn(format="%.0f%%")},
+                hide_index=True,
+                use_container_width=True
+            )
+        with col2:
+            st.subheader("Counters")
+            st.dataframe(
+                pd.DataFrame(list(counters.items()), columns=['Counter', 'Total']),
+                hide_index=True,
+                use_container_width=True
+            )
+
+    def run(self):
+        st.title("Performance")
+
+        col1, col2 = st.columns(2)
+        window = col1.radio("Window", list(WINDOWS), horizontal=True, key='performance_window')
+        events = self.load_events(window)
+        if not events:
+            st.info("No telemetry recorded in this window yet.")
+            return
+
+        # Every event recorded during a page's rerun carries that page
+        pages = sorted({event['page'] for event in events if 'page' in event})
+        page = col2.selectbox("Page", ['All pages'] + pages, key='performance_page')
+        if page != 'All pages':
+            events = [event for event in events if event.get('page') == page]
+
+        summary = summarise(events)
+        self.display_page_reruns(summary['timings'])
+        self.display_latencies(summary['timings'])
+        self.display_caches(summary['caches'], summary['counters'])
+
+# Display the telemetry only if the user enters the correct password
+with page_run('performance'):
+    if check_password("Enter the password to view the performance telemetry:"):
+        PerformanceApp().run()
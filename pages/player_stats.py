@@ -1,25 +1,33 @@
 # player_stats_display.py
 
 import streamlit as st
-import os
 import json
-from PIL import Image
-from utils import DataLoader
+import plotly.graph_objects as go
+from utils import DataLoader, SelectTeam, load_player_thumbnail
+from generate_form_data import load_form
+from telemetry import page_run
 
 class PlayerStatsDisplayApp:
-    def __init__(self):
+    def __init__(self, team):
+        self.team = team
         self.player_stats = {}
-        self.results_df = None
+        self.form = {}
+        self.seasons = []
+        self.store = None
+        self.player_ids = {}
 
     def load_data(self):
-        with open("data/player_stats/player_stats.json", "r") as f:
+        with open(self.team.player_stats_path, "r") as f:
             self.player_stats = json.load(f)
-        loader = DataLoader()
-        self.results_df = loader.results_data()
+        loader = DataLoader(self.team)
+        self.store = loader.query()
+        self.seasons = self.store.seasons()
+        players = loader.players_data()
+        self.player_ids = dict(zip(players['Player'], players['player_id']))
+        self.form = load_form(self.team)
 
     def load_player_image(self, player_name):
-        image_path = f'player_images/{player_name}.png'
-        return Image.open(image_path) if os.path.exists(image_path) else None
+        return load_player_thumbnail(player_name, width=200, team=self.team)
 
     def display_player_stats(self, player, season):
         stats = self.player_stats.get(player, {}).get(season, None)
@@ -42,6 +50,39 @@ class PlayerStatsDisplayApp:
             st.write(f"**Win Rate:** {stats['win_rate']:.2f}%")
             st.write(f"**Goals Per Game:** {stats['goals_per_game']:.2f}")
 
+        self.display_match_log(player, season)
+
+    def display_match_log(self, player, season):
+        player_id = self.player_ids.get(player)
+        if player_id is None:
+            return
+
+        events = self.store.player_events(player_id, season)
+        with st.expander("Match log"):
+            st.dataframe(
+                events[['gameweek_id', 'appeared', 'goals']].rename(
+                    columns={'gameweek_id': 'Gameweek', 'appeared': 'Appeared', 'goals': 'Goals'}
+                ),
+                hide_index=True,
+                use_container_width=True
+            )
+
+    def display_player_form(self, player):
+        player_form = self.form['players'].get(player)
+        if not player_form:
+            return
+
+        window = self.form['window']
+        st.subheader(f"Form (Last {window} Games)")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Goals Per Game", f"{player_form['goals_per_game'][-1]:.2f}")
+        col2.metric("Win Rate", f"{player_form['win_rate'][-1]:.0f}%")
+        col3.metric("Scoring Streak", player_form['scoring_streak'][-1])
+
+        fig = go.Figure(go.Scatter(x=self.form['team']['Gameweek'], y=player_form['goals_per_game'], mode='lines', name=player))
+        fig.update_layout(xaxis_title='Gameweek', yaxis_title=f'Goals Per Game (last {window})', height=300)
+        st.plotly_chart(fig, use_container_width=True)
+
     def run(self):
         self.load_data()
         st.title("Player Statistics")
@@ -49,13 +90,14 @@ class PlayerStatsDisplayApp:
         players = sorted(self.player_stats.keys())
         player = st.selectbox("Select a player", players)
 
-        seasons = sorted(self.results_df['Season'].unique())
+        seasons = self.seasons
         tab_labels = ['All Seasons'] + seasons
         tabs = st.tabs(tab_labels)
 
         with tabs[0]:
             st.subheader("All Seasons")
             self.display_player_stats(player, season='All Seasons')
+            self.display_player_form(player)
 
         for i, season in enumerate(seasons):
             with tabs[i + 1]:
@@ -64,5 +106,6 @@ class PlayerStatsDisplayApp:
 
 # Run app
 if __name__ == "__main__":
-    app = PlayerStatsDisplayApp()
-    app.run()
+    with page_run('player_stats'):
+        app = PlayerStatsDisplayApp(SelectTeam().team)
+        app.run()
@@ -1,24 +1,26 @@
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
-from utils import DataLoader
+from utils import DataLoader, SelectTeam
+from generate_team_stats_data import season_stats_file
+from file_utils import load_arrays
+from generate_form_data import load_form
+from telemetry import page_run, timed
 
 class TeamStatsApp:
-    def __init__(self):
-        self.results_df = None
+    def __init__(self, team):
+        self.team = team
+        self.seasons = []
 
-    def load_results_data(self):
-        loader = DataLoader()
-        return loader.results_data()
+    def load_seasons(self):
+        return DataLoader(self.team).query().seasons()
 
-    def load_goals_long(self, season=None):
-        path = "data/team_stats"
-        if season is None or season == "All":
-            return pd.read_csv(f"{path}/all_seasons.csv")
-        else:
-            return pd.read_csv(f"{path}/{season}.csv")
+    def load_cumulative_goals(self, season=None):
+        path = self.team.team_stats_dir / season_stats_file(None if season == "All" else season)
+        stat = path.stat()
+        return _cached_cumulative_goals(str(path), stat.st_mtime_ns, stat.st_size)
 
-    def display_plot(self, goals_long, title):
+    @timed('team_stats.display_plot')
+    def display_plot(self, arrays, title):
         fig = go.Figure()
 
         # Extended color palette (20+ distinct colors)
@@ -30,12 +32,13 @@ class TeamStatsApp:
             '#393b79', '#637939', '#8c6d31', '#843c39', '#7b4173'
         ]
 
-        players = goals_long['Player'].unique()
-        for i, player in enumerate(players):
-            player_data = goals_long[goals_long['Player'] == player]
+        # One row slice per player: the gameweeks they have a record for
+        gameweeks = arrays['gameweeks']
+        for i, player in enumerate(arrays['players']):
+            recorded = arrays['recorded'][i]
             fig.add_trace(go.Scatter(
-                x=player_data['Gameweek'],
-                y=player_data['Cumulative Goals'],
+                x=gameweeks[recorded],
+                y=arrays['cumulative'][i, recorded],
                 mode='lines+markers',
                 name=player,
                 line=dict(color=extended_colors[i % len(extended_colors)])
@@ -52,19 +55,46 @@ class TeamStatsApp:
         st.plotly_chart(fig, use_container_width=True)
 
 
+    def display_form(self, season):
+        form = load_form(self.team)
+        team_form = form['team']
+        matches = [i for i, match_season in enumerate(team_form['Season']) if season == 'All' or match_season == season]
+        if not matches:
+            return
+
+        window = form['window']
+        gameweeks = [team_form['Gameweek'][i] for i in matches]
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=gameweeks, y=[team_form['win_rate'][i] for i in matches], mode='lines+markers', name='Win Rate (%)'))
+        fig.add_trace(go.Scatter(x=gameweeks, y=[team_form['points_per_game'][i] for i in matches], mode='lines+markers', name='Points Per Game', yaxis='y2'))
+        fig.update_layout(
+            title=f"Rolling Form (Last {window}) - {'All Seasons' if season == 'All' else season}",
+            xaxis_title='Gameweek',
+            yaxis=dict(title='Win Rate (%)', range=[0, 100]),
+            yaxis2=dict(title='Points Per Game', overlaying='y', side='right', range=[0, 3]),
+            height=400
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
     def run(self):
-        self.results_df = self.load_results_data()
+        self.seasons = self.load_seasons()
 
         st.title("Team Stats - Goals Over Time")
-        all_seasons = sorted(self.results_df['Season'].unique().tolist())
-        tabs = st.tabs(['All Seasons'] + all_seasons)
 
-        for i, season in enumerate(['All'] + all_seasons):
-            with tabs[i]:
-                goals_long = self.load_goals_long(season if season != "All" else None)
-                title = f"Cumulative Goals - {season}" if season != 'All' else "Cumulative Goals - All Seasons"
-                self.display_plot(goals_long, title)
+        # Only the selected season is loaded and plotted
+        labels = {'All Seasons': 'All', **{season: season for season in self.seasons}}
+        label = st.radio("Season", list(labels), horizontal=True, label_visibility="collapsed", key='team_stats_season')
+        season = labels[label]
+
+        title = f"Cumulative Goals - {season}" if season != 'All' else "Cumulative Goals - All Seasons"
+        self.display_plot(self.load_cumulative_goals(season), title)
+        self.display_form(season)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _cached_cumulative_goals(path, mtime_ns, size):
+    return load_arrays(path)
 
 if __name__ == "__main__":
-    app = TeamStatsApp()
-    app.run()
+    with page_run('team_stats'):
+        app = TeamStatsApp(SelectTeam().team)
+        app.run()
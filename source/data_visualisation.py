@@ -1,6 +1,3 @@
-import matplotlib.pyplot as plt
-import matplotlib.image as mpimg
-import matplotlib.offsetbox as offsetbox
 import os
 
 class FootballVisualisation:
@@ -20,6 +17,11 @@ class FootballVisualisation:
         Plot a line graph showing the cumulative goal count over time for each player and place player images
         at their final cumulative goal positions for the maximum gameweek.
         """
+        # matplotlib is only needed when a plot is drawn
+        import matplotlib.pyplot as plt
+        import matplotlib.image as mpimg
+        import matplotlib.offsetbox as offsetbox
+
         # Set up the figure and axis with a white background color
         fig, ax = plt.subplots(figsize=(14, 8))  # Increased figure size
         ax.set_facecolor('white')  # White background color for a clean look
@@ -0,0 +1,218 @@
+# startup_profile.py
+#
+# The baseline holds no absolute timings, since those depend on the machine
+# that took them. Each cold start is stored relative to a reference process
+# that only imports pandas, next to the key heavy packages the entry point
+# loads. Regenerate it with `make startup_baseline` on an idle machine after
+# an intended startup change, and commit the new startup_baseline.json.
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+APP_DIR = Path(__file__).parent
+BASELINE_PATH = APP_DIR / 'startup_baseline.json'
+PAGES = [
+    'Home.py',
+    'pages/player_stats.py',
+    'pages/team_stats.py',
+    'pages/partnerships.py',
+    'pages/match_forecaster.py',
+    'pages/managers_office.py',
+    'pages/performance.py',
+]
+SCRIPTS = [
+    'generate_homepage_data.py',
+    'generate_player_stats_data.py',
+    'generate_team_stats_data.py',
+    'generate_form_data.py',
+    'generate_synergy_data.py',
+    'generate_thumbnails.py',
+    'generate_player_goals_model.py',
+    'generate_goals_against_model.py',
+    'model_registry.py',
+    'match_ledger.py',
+    'build.py',
+    'backtest.py',
+]
+REPEATS = 3
+# Every entry point pays for this; cold starts are budgeted as multiples of it
+REFERENCE = 'import pandas'
+# Heavy packages an entry point must not start loading without a new baseline
+KEY_MODULES = ['streamlit', 'pandas', 'numpy', 'scipy', 'sklearn', 'joblib', 'plotly', 'PIL']
+# A relative cold start above the baseline's by both of these fails --compare
+REGRESSION_TOLERANCE = 0.25
+REGRESSION_MIN_RELATIVE = 0.3  # in multiples of the reference start, so run-to-run noise passes
+
+# Runs one page in a fresh interpreter; the harness import is kept out of the timing
+RENDER_PAGE = """
+import sys, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+print(time.perf_counter() - start, len(at.exception))
+"""
+
+
+def top_level_imports(entry_point):
+    """The module-level import statements of ``entry_point``, as source."""
+    tree = ast.parse((APP_DIR / entry_point).read_text())
+    return '\n'.join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def _importtime(entry_point):
+    """``(module name, cumulative seconds)`` for every import line of ``python -X importtime``."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', top_level_imports(entry_point)],
+        cwd=APP_DIR, env=_env(), capture_output=True, text=True
+    )
+    lines = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        lines.append((name, int(cumulative) / 1e6))
+    return lines
+
+
+def import_times(entry_point):
+    """``{top-level module: cumulative seconds}`` for every module the entry point's imports load."""
+    # Nested imports are indented under the module that triggered them
+    return {name.strip(): seconds for name, seconds in _importtime(entry_point) if not name.startswith('  ')}
+
+
+def key_modules(entry_point):
+    """The ``KEY_MODULES`` loaded by the entry point's module-level imports, directly or not."""
+    loaded = {name.strip().split('.')[0] for name, _ in _importtime(entry_point)}
+    return [module for module in KEY_MODULES if module in loaded]
+
+
+def cold_start(entry_point):
+    """Wall time of a fresh process: a page's first render, or a script up to its --help."""
+    if entry_point in PAGES:
+        result = subprocess.run([sys.executable, '-c', RENDER_PAGE, entry_point],
+                                cwd=APP_DIR, env=_env(), capture_output=True, text=True)
+        seconds, errors = result.stdout.split()[-2:]
+        return float(seconds), int(errors) == 0
+
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, entry_point, '--help'],
+                            cwd=APP_DIR, env=_env(), capture_output=True, text=True)
+    return time.perf_counter() - start, result.returncode == 0
+
+
+def reference_start(repeats=REPEATS):
+    """Median wall time of a fresh process running ``REFERENCE``."""
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', REFERENCE], cwd=APP_DIR, env=_env(), check=True)
+        runs.append(time.perf_counter() - start)
+    return sorted(runs)[len(runs) // 2]
+
+
+def _env():
+    return {**os.environ, 'PYTHONPATH': str(APP_DIR)}
+
+
+def profile(entry_points, repeats=REPEATS, top=3):
+    """Import breakdown and median cold start over ``repeats`` fresh processes per entry point.
+
+    ``relative_start`` is the cold start as a multiple of ``reference_start()``.
+    """
+    reference = reference_start(repeats)
+    profiles = {}
+    for entry_point in entry_points:
+        times = import_times(entry_point)
+        runs = [cold_start(entry_point) for _ in range(repeats)]
+        seconds = sorted(run[0] for run in runs)[len(runs) // 2]
+        ok = all(run[1] for run in runs)
+        heaviest = sorted(times.items(), key=lambda item: item[1], reverse=True)[:top]
+        profiles[entry_point] = {
+            'imports_s': sum(times.values()),
+            'cold_start_s': seconds,
+            'relative_start': seconds / reference,
+            'ok': ok,
+            'heaviest': [[name, round(cumulative, 4)] for name, cumulative in heaviest],
+            'key_modules': key_modules(entry_point),
+        }
+    return profiles
+
+
+def baseline_budgets(profiles):
+    """The machine-independent part of ``profiles``: relative cold starts and key modules."""
+    return {
+        'reference': REFERENCE,
+        'entry_points': {
+            entry_point: {
+                'relative_start': round(profile['relative_start'], 2),
+                'key_modules': profile['key_modules'],
+            }
+            for entry_point, profile in profiles.items()
+        },
+    }
+
+
+def print_profiles(profiles):
+    print(f"{'Entry point':<34} {'Imports':>8} {'Cold start':>11}  Heaviest imports")
+    for entry_point, profile in profiles.items():
+        heaviest = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in profile['heaviest'])
+        status = '' if profile['ok'] else '  (errored)'
+        print(f"{entry_point:<34} {profile['imports_s']:>7.2f}s {profile['cold_start_s']:>10.2f}s  {heaviest}{status}")
+
+
+def compare(profiles, baseline):
+    """Print each entry point's relative cold start against the baseline's.
+
+    False if any slowed past the tolerance or now loads a key module its
+    baseline does not.
+    """
+    slower, heavier = [], []
+    print(f"{'Entry point':<34} {'Baseline':>9} {'Current':>9} {'Change':>8}  (x {baseline['reference']})")
+    for entry_point, profile in profiles.items():
+        if entry_point not in baseline['entry_points']:
+            continue
+        budget = baseline['entry_points'][entry_point]
+        before, after = budget['relative_start'], profile['relative_start']
+        print(f"{entry_point:<34} {before:>8.2f}x {after:>8.2f}x {(after - before) / before:>+8.0%}")
+        if after > before * (1 + REGRESSION_TOLERANCE) and after - before > REGRESSION_MIN_RELATIVE:
+            slower.append(entry_point)
+        added = [module for module in profile['key_modules'] if module not in budget['key_modules']]
+        if added:
+            heavier.append(f"{entry_point} ({', '.join(added)})")
+
+    if slower:
+        print(f"❌ Slower cold start than the baseline: {', '.join(slower)}")
+    if heavier:
+        print(f"❌ New heavy imports: {', '.join(heavier)}")
+    if slower or heavier:
+        return False
+    print("✅ No cold-start regressions against the baseline")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import-time audit and cold-start benchmark of the pages and scripts.")
+    parser.add_argument('entry_points', nargs='*', help="Pages or scripts to profile (default: all of them).")
+    parser.add_argument('--repeat', type=int, default=REPEATS, help="Cold starts per entry point; the median is reported.")
+    parser.add_argument('--save-baseline', action='store_true', help=f"Store relative cold starts and key modules in {BASELINE_PATH.name}.")
+    parser.add_argument('--compare', action='store_true', help="Compare cold starts against the stored baseline.")
+    args = parser.parse_args()
+
+    profiles = profile(args.entry_points or PAGES + SCRIPTS, args.repeat)
+    print_profiles(profiles)
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baseline_budgets(profiles), f, indent=2)
+        print(f"✅ Baseline saved to {BASELINE_PATH}")
+
+    if args.compare:
+        with open(BASELINE_PATH, 'r') as f:
+            baseline = json.load(f)
+        sys.exit(0 if compare(profiles, baseline) else 1)
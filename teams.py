@@ -0,0 +1,102 @@
+# teams.py
+
+import json
+import const as c
+
+DEFAULT_TEAM = {
+    'default': 'bielsas-rejects',
+    'teams': {'bielsas-rejects': {'name': 'Bielsas Rejects', 'goalkeepers': ['Jack J', 'Keenan']}},
+}
+
+
+class Team:
+    """One team's partition: its match data, derived stats, models and player images."""
+
+    def __init__(self, slug, name, goalkeepers=(), default=False):
+        self.slug = slug
+        self.name = name
+        self.goalkeepers = list(goalkeepers)
+        self.default = default
+
+        # The default team keeps the original single-team layout
+        self.data_path = c.DATA_PATH if default else c.TEAMS_PATH / slug
+        self.models_path = c.MODELS_PATH if default else c.MODELS_PATH / 'teams' / slug
+        self.images_path = c.PLAYER_IMAGES_PATH if default else c.PLAYER_IMAGES_PATH / 'teams' / slug
+
+    def __repr__(self):
+        return f"Team({self.slug!r})"
+
+    @property
+    def cache_path(self):
+        return self.data_path / c.CACHE_PATH.name
+
+    @property
+    def ledger_path(self):
+        return self.data_path / c.LEDGER_FILE_PATH.name
+
+    @property
+    def homepage_dir(self):
+        return self.data_path / 'homepage'
+
+    @property
+    def player_stats_path(self):
+        return self.data_path / 'player_stats' / 'player_stats.json'
+
+    @property
+    def team_stats_dir(self):
+        return self.data_path / 'team_stats'
+
+    @property
+    def form_path(self):
+        return self.data_path / 'form' / 'form.json'
+
+    @property
+    def synergy_path(self):
+        return self.data_path / 'synergy' / 'synergy.npz'
+
+    @property
+    def thumbnails_path(self):
+        return self.images_path / c.THUMBNAILS_PATH.name
+
+
+_REGISTRY = {}
+
+
+def load_teams():
+    """Teams from ``TEAMS_FILE_PATH`` keyed by slug, re-read when the file changes."""
+    try:
+        stat = c.TEAMS_FILE_PATH.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        signature = None
+
+    if _REGISTRY.get('signature', False) != signature:
+        config = DEFAULT_TEAM
+        if signature is not None:
+            with open(c.TEAMS_FILE_PATH, 'r') as f:
+                config = json.load(f)
+
+        _REGISTRY['teams'] = {
+            slug: Team(slug, team.get('name', slug), team.get('goalkeepers', ()), default=slug == config['default'])
+            for slug, team in config['teams'].items()
+        }
+        _REGISTRY['default'] = config['default']
+        _REGISTRY['signature'] = signature
+
+    return _REGISTRY['teams']
+
+
+def get_team(team=None):
+    """Resolve a Team, a slug or None (the default team)."""
+    if isinstance(team, Team):
+        return team
+
+    teams = load_teams()
+    slug = team or _REGISTRY['default']
+    if slug not in teams:
+        raise ValueError(f"Unknown team '{slug}'. Known teams: {', '.join(teams)}")
+    return teams[slug]
+
+
+def add_team_argument(parser):
+    parser.add_argument('--team', default=None, help="Team slug from data/teams.json (default: the default team).")
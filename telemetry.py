@@ -0,0 +1,246 @@
+# telemetry.py
+
+import argparse
+import atexit
+import json
+import os
+import threading
+import time
+from functools import wraps
+from pathlib import Path
+import numpy as np
+import const as c
+from file_utils import file_lock
+
+PAGE_PREFIX = 'page.'
+PROMETHEUS_PREFIX = 'fives'
+
+
+class TelemetryLog:
+    """Buffered writer of telemetry events to a rotating JSONL file.
+
+    Events are held in memory and appended in one write ``flush_delay``
+    seconds after the first of them, and at exit, under the file's lock so
+    several processes can share it. Past ``max_bytes`` the file is rotated to
+    ``<path>.1`` ... ``<path>.<backups>`` and the oldest copy dropped.
+    """
+
+    def __init__(self, path, max_bytes=c.TELEMETRY_MAX_BYTES, backups=c.TELEMETRY_BACKUPS,
+                 flush_delay=c.TELEMETRY_FLUSH_DELAY):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_delay = flush_delay
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+
+    def record(self, event):
+        with self._lock:
+            self._pending.append(event)
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            self._timer = None
+            events, self._pending = self._pending, []
+        if not events:
+            return
+
+        lines = ''.join(json.dumps(event) + '\n' for event in events)
+        try:
+            os.makedirs(self.path.parent, exist_ok=True)
+            with file_lock(self.path):
+                if self.path.exists() and self.path.stat().st_size >= self.max_bytes:
+                    self._rotate()
+                with open(self.path, 'a') as f:
+                    f.write(lines)
+        except OSError:
+            return  # A read-only filesystem loses the events, never the page or build
+
+    def files(self):
+        """The log and its rotated copies that exist, oldest first."""
+        paths = [self._rotated(i) for i in range(self.backups, 0, -1)] + [self.path]
+        return [path for path in paths if path.exists()]
+
+    def _rotated(self, i):
+        return self.path.with_name(f"{self.path.name}.{i}")
+
+    def _rotate(self):
+        for i in range(self.backups - 1, 0, -1):
+            if self._rotated(i).exists():
+                os.replace(self._rotated(i), self._rotated(i + 1))
+        os.replace(self.path, self._rotated(1))
+
+
+_log = TelemetryLog(c.TELEMETRY_FILE_PATH)
+atexit.register(_log.flush)
+
+# The page a Streamlit script thread is running, attached to every event it records
+_context = threading.local()
+
+
+def record(kind, name, **fields):
+    if not c.TELEMETRY_ENABLED:
+        return
+    event = {'ts': round(time.time(), 3), 'kind': kind, 'name': name, 'pid': os.getpid(), **fields}
+    page = getattr(_context, 'page', None)
+    if page is not None:
+        event.setdefault('page', page)
+    _log.record(event)
+
+
+def count(name, value=1, **tags):
+    record('counter', name, value=value, **tags)
+
+
+def cache_lookup(name, hit, **tags):
+    record('cache', name, hit=bool(hit), **tags)
+
+
+class timed:
+    """Record how long a block or function takes as a timing event called ``name``.
+
+    Use it as ``with timed(name):`` or as a ``@timed(name)`` decorator.
+    """
+
+    def __init__(self, name, **tags):
+        self.name = name
+        self.tags = tags
+        self._start = None
+
+    def start(self):
+        self._start = time.perf_counter()
+        return self
+
+    def stop(self):
+        record('timing', self.name, seconds=round(time.perf_counter() - self._start, 6), **self.tags)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def __call__(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(self.name, **self.tags):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+class page_run(timed):
+    """Time one Streamlit rerun of ``page`` and tag the events recorded during it with the page."""
+
+    def __init__(self, page):
+        super().__init__(PAGE_PREFIX + page)
+        self.page = page
+
+    def start(self):
+        _context.page = self.page
+        return super().start()
+
+    def stop(self):
+        try:
+            super().stop()
+        finally:
+            _context.page = None
+
+
+def read_events(since=None, log=_log):
+    """Every recorded event, oldest first; ``since`` is a Unix time to start from."""
+    log.flush()
+    events = []
+    for path in log.files():
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A line cut short by a crash
+                if since is None or event['ts'] >= since:
+                    events.append(event)
+    return events
+
+
+def summarise(events):
+    """p50/p95 latency per timing, the total per counter and the hit ratio per cache."""
+    timings, counters, caches = {}, {}, {}
+    for event in events:
+        name = event['name']
+        if event['kind'] == 'timing':
+            timings.setdefault(name, []).append(event['seconds'])
+        elif event['kind'] == 'counter':
+            counters[name] = counters.get(name, 0) + event['value']
+        elif event['kind'] == 'cache':
+            hits, lookups = caches.get(name, (0, 0))
+            caches[name] = (hits + event['hit'], lookups + 1)
+
+    return {
+        'timings': {
+            name: {
+                'count': len(seconds),
+                'p50_s': float(np.percentile(seconds, 50)),
+                'p95_s': float(np.percentile(seconds, 95)),
+                'total_s': float(np.sum(seconds)),
+            }
+            for name, seconds in sorted(timings.items())
+        },
+        'counters': dict(sorted(counters.items())),
+        'caches': {
+            name: {'lookups': lookups, 'hit_ratio': hits / lookups}
+            for name, (hits, lookups) in sorted(caches.items())
+        },
+    }
+
+
+def prometheus_text(summary):
+    """The summary in the Prometheus text exposition format."""
+    lines = [f"# TYPE {PROMETHEUS_PREFIX}_latency_seconds summary"]
+    for name, timing in summary['timings'].items():
+        lines.append(f'{PROMETHEUS_PREFIX}_latency_seconds{{name="{name}",quantile="0.5"}} {timing["p50_s"]}')
+        lines.append(f'{PROMETHEUS_PREFIX}_latency_seconds{{name="{name}",quantile="0.95"}} {timing["p95_s"]}')
+        lines.append(f'{PROMETHEUS_PREFIX}_latency_seconds_sum{{name="{name}"}} {timing["total_s"]}')
+        lines.append(f'{PROMETHEUS_PREFIX}_latency_seconds_count{{name="{name}"}} {timing["count"]}')
+
+    lines.append(f"# TYPE {PROMETHEUS_PREFIX}_events_total counter")
+    for name, value in summary['counters'].items():
+        lines.append(f'{PROMETHEUS_PREFIX}_events_total{{name="{name}"}} {value}')
+
+    lines.append(f"# TYPE {PROMETHEUS_PREFIX}_cache_hit_ratio gauge")
+    for name, cache in summary['caches'].items():
+        lines.append(f'{PROMETHEUS_PREFIX}_cache_hit_ratio{{name="{name}"}} {cache["hit_ratio"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def print_summary(summary):
+    print(f"{'Timing':<40} {'Count':>7} {'p50':>10} {'p95':>10}")
+    for name, timing in summary['timings'].items():
+        print(f"{name:<40} {timing['count']:>7} {timing['p50_s'] * 1000:>8.1f}ms {timing['p95_s'] * 1000:>8.1f}ms")
+    print(f"\n{'Cache':<40} {'Lookups':>7} {'Hit ratio':>10}")
+    for name, cache in summary['caches'].items():
+        print(f"{name:<40} {cache['lookups']:>7} {cache['hit_ratio']:>10.0%}")
+    print(f"\n{'Counter':<40} {'Total':>7}")
+    for name, value in summary['counters'].items():
+        print(f"{name:<40} {value:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarise the recorded timings, cache lookups and counters.")
+    parser.add_argument('--hours', type=float, default=None, help="Only the last N hours (default: everything kept).")
+    parser.add_argument('--prometheus', type=Path, default=None,
+                        help="Also write the summary to this file in the Prometheus text format.")
+    args = parser.parse_args()
+
+    events = read_events(since=None if args.hours is None else time.time() - args.hours * 3600)
+    summary = summarise(events)
+    print_summary(summary)
+
+    if args.prometheus:
+        with open(args.prometheus, 'w') as f:
+            f.write(prometheus_text(summary))
+        print(f"✅ Prometheus metrics written to {args.prometheus}")
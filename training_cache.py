@@ -0,0 +1,59 @@
+# training_cache.py
+
+import hashlib
+import json
+import numpy as np
+
+
+def training_fingerprint(estimator, X, y, settings=None, columns=None):
+    """Content hash of a training set plus the estimator's class and hyperparameters.
+
+    ``X`` is a DataFrame, or a SciPy sparse matrix whose column names are
+    passed as ``columns``; a sparse matrix is hashed through its CSR arrays
+    without being densified. ``settings`` covers anything else that shapes
+    the fit but is not an estimator parameter, such as a transform applied
+    to ``X`` before fitting.
+    """
+    import sklearn
+    from scipy import sparse
+
+    if sparse.issparse(X):
+        X = sparse.csr_matrix(X, copy=True)
+        # Canonical form (sorted indices, one stored entry per nonzero cell), so equal matrices hash equally
+        X.sum_duplicates()
+        X.eliminate_zeros()
+        arrays = [X.data.astype('float64'), X.indices.astype('int64'), X.indptr.astype('int64')]
+    else:
+        columns = list(X.columns)
+        arrays = [X.to_numpy(dtype='float64')]
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        'estimator': type(estimator).__name__,
+        'params': estimator.get_params(),
+        'sklearn': sklearn.__version__,
+        'columns': list(columns),
+        'shape': list(X.shape),
+        'settings': settings or {},
+    }, sort_keys=True, default=str).encode())
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array).tobytes())
+    digest.update(np.ascontiguousarray(np.asarray(y, dtype='float64')).tobytes())
+    return digest.hexdigest()
+
+
+def fingerprint_path(model_path):
+    """The hash is stored next to the model: foo.joblib -> foo.sha256."""
+    return model_path.with_suffix('.sha256')
+
+
+def is_fresh(model_path, fingerprint):
+    """True when the saved model was trained on exactly this data."""
+    hash_path = fingerprint_path(model_path)
+    if not model_path.exists() or not hash_path.exists():
+        return False
+    return hash_path.read_text().strip() == fingerprint
+
+
+def record_fingerprint(model_path, fingerprint):
+    fingerprint_path(model_path).write_text(fingerprint + '\n')
@@ -1,40 +1,135 @@
 import pandas as pd
-import streamlit as st
 import os
+import io
+import hmac
 import json
+import sqlite3
+import atexit
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
 import const as c
+from file_utils import atomic_write, file_lock
+from telemetry import cache_lookup, count, timed
+from match_ledger import apply_entries, read_entries
+from match_store import PandasMatchStore, SQLiteMatchStore
+from teams import get_team, load_teams
+from match_events import EVENT_COLUMNS, PLAYER_COLUMNS, gameweek_column, long_to_wide, wide_to_long
+
+class SessionStateStore:
+    """Write-back cache over the shared session state JSON file.
+
+    Reads come from memory and only re-read the file when another process has
+    changed it. Writes that change a value are batched for ``flush_delay``
+    seconds, then merged into the file under an exclusive lock and written via
+    a temp file and rename, so readers never see a partial file.
+    """
+
+    def __init__(self, path, flush_delay=c.SESSION_STATE_FLUSH_DELAY):
+        self.path = Path(path)
+        self.flush_delay = flush_delay
+        self._lock = threading.RLock()
+        self._state = {}
+        self._pending = {}
+        self._signature = None
+        self._timer = None
+
+    def get(self, key):
+        with self._lock:
+            self._refresh()
+            return self._state.get(key, None)
+
+    def set(self, key, value):
+        with self._lock:
+            self._refresh()
+            if key in self._state and self._state[key] == value:
+                count('session_state.unchanged')
+                return  # Nothing changed, nothing to write
+
+            count('session_state.changed')
+            self._state[key] = value
+            self._pending[key] = value
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            self._timer = None
+            if not self._pending:
+                return
+
+            os.makedirs(self.path.parent, exist_ok=True)
+            with timed('session_state.flush'), file_lock(self.path):
+                # Merge into whatever other processes have written meanwhile
+                session_state = self._read_file()
+                session_state.update(self._pending)
+                atomic_write(self.path, lambda f: json.dump(session_state, f, indent=4))
+
+            self._state = session_state
+            self._pending = {}
+            self._signature = self._file_signature()
+
+    def _refresh(self):
+        signature = self._file_signature()
+        if signature != self._signature:
+            self._state = {**self._read_file(), **self._pending}
+            self._signature = signature
+
+    def _file_signature(self):
+        try:
+            return _file_signature(self.path)
+        except FileNotFoundError:
+            return None
+
+    def _read_file(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}  # Initialize if the file doesn't exist
+
+
+_session_store = SessionStateStore(c.SESSION_STATE_FILE_PATH)
+atexit.register(_session_store.flush)
+
 
 def update_session_state(key, value):
-    # Load existing session state from the JSON file
-    try:
-        with open(c.SESSION_STATE_FILE_PATH, 'r') as f:
-            session_state = json.load(f)
-    except FileNotFoundError:
-        session_state = {}  # Initialize if the file doesn't exist
+    _session_store.set(key, value)
+
 
-    # Update the session state
-    session_state[key] = value
+def get_session_state(key):
+    return _session_store.get(key)
 
-    # Write the updated session state back to the JSON file
-    with open(c.SESSION_STATE_FILE_PATH, 'w') as f:
-        json.dump(session_state, f, indent=4)
 
+def check_password(prompt="Enter the password to visit the manager's office:"):
+    """Returns `True` if the user has the correct password."""
+    import streamlit as st
 
+    def password_entered():
+        """Checks whether a password entered by the user is correct."""
+        if hmac.compare_digest(st.session_state["password"], st.secrets["password"]):
+            st.session_state["password_correct"] = True
+            del st.session_state["password"]
+        else:
+            st.session_state["password_correct"] = False
 
-def get_session_state(key):
-    try:
-        # Load session state from the JSON file
-        with open(c.SESSION_STATE_FILE_PATH, 'r') as f:
-            session_state = json.load(f)
-            return session_state.get(key, None)  # Return the value or None if the key doesn't exist
-    except FileNotFoundError:
-        return None  # Return None if the file doesn't exist
-
-
-def get_season(current_season=None):
-    # Load season options from CSV
-    results_df = pd.read_csv("data/results_all.csv")
-    season_options = sorted(results_df['Season'].dropna().unique(), reverse=True)
+    if st.session_state.get("password_correct", False):
+        return True
+
+    st.text_input(prompt, type="password", on_change=password_entered, key="password")
+    if "password_correct" in st.session_state:
+        st.error("😕 Blimey, that was further off than the average Jake shot!")
+    return False
+
+
+def get_season(current_season=None, team=None):
+    import streamlit as st
+
+    # Load season options from the match store
+    season_options = sorted(DataLoader(team).query().seasons(), reverse=True)
     season_options.insert(0, "All seasons")  # Add "All seasons" option at the top
 
     # Sidebar: Season selector
@@ -46,9 +141,11 @@ def get_season(current_season=None):
     current_season = selected_season
 
 class SelectSeason:
-    def __init__(self):
-        # Load the pipeline families from the CSV
-        self.results_df = pd.read_csv("data/results_all.csv")['Season'].unique().tolist()
+    def __init__(self, team=None):
+        import streamlit as st
+
+        # Load the seasons from the match store
+        self.results_df = DataLoader(team).query().seasons()
         self.results_df.append("All seasons")
 
         # Ensure 'selected_pipeline_family' is in the session state
@@ -73,70 +170,352 @@ class SelectSeason:
         update_session_state('selected_season', st.session_state['selected_season'])
 
 
-class DataLoader:
+class SelectTeam:
+    """Sidebar team picker; ``self.team`` is the chosen Team.
+
+    With a single registered team there is nothing to pick and no widget is shown.
+    """
+
     def __init__(self):
-        self.data_folder = c.DATA_PATH
+        # Streamlit is only loaded by the pages, not by batch scripts using DataLoader
+        import streamlit as st
+
+        teams = load_teams()
+        slugs = list(teams)
+        default_slug = get_team().slug
+
+        if 'selected_team' not in st.session_state:
+            st.session_state['selected_team'] = get_session_state('selected_team')
+
+        selected_team = st.session_state['selected_team']
+        if selected_team not in teams:
+            selected_team = default_slug
+
+        if len(slugs) > 1:
+            names = [teams[slug].name for slug in slugs]
+            selected_name = st.sidebar.selectbox(
+                'Select team',
+                options=names,
+                index=slugs.index(selected_team),
+                key='team',
+                help='Select the team you want to work with.'
+            )
+            selected_team = slugs[names.index(selected_name)]
+            update_session_state('selected_team', selected_team)
+
+        st.session_state['selected_team'] = selected_team
+        self.team = teams[selected_team]
+
+
+class DataLoader:
+    """Loads the match data once per process, keyed on each CSV's mtime and size.
+
+    A Parquet copy under the team's cache folder saves a fresh process the
+    CSV parse. Results and events are the CSV snapshots with the match ledger
+    replayed over them. ``team`` is a Team or slug; None is the default team.
+    """
+
+    def __init__(self, team=None):
+        self.team = get_team(team)
+        self.data_folder = self.team.data_path
+        self.ledger_path = self.team.ledger_path
 
     def results_data(self):
-        df = pd.read_csv(self.data_folder / 'results_all.csv')
-        return df
-    
+        if not self.has_ledger():
+            return self.snapshot_results()
+        return self._ledger_tables()[0]
+
+    def has_event_table(self):
+        return (self.data_folder / 'match_events.csv').exists()
+
+    def has_ledger(self):
+        return self.ledger_path.exists() and self.ledger_path.stat().st_size > 0
+
+    def players_data(self):
+        if not self.has_event_table():
+            return self._legacy_event_tables()[0]
+        return load_table(self.data_folder / 'players.csv', _normalise_players, self._cache())
+
+    def match_events(self):
+        """Long table of (player_id, gameweek_id, appeared, goals) rows."""
+        if not self.has_ledger():
+            return self.snapshot_events()
+        return self._ledger_tables()[1]
+
+    def query(self, backend=None):
+        """Indexed lookups (seasons, per-season gameweeks, per-gameweek events) over the match data.
+
+        ``backend`` defaults to ``const.DATA_BACKEND``; the SQLite store falls
+        back to the in-memory one if its database cannot be built.
+        """
+        backend = backend or c.DATA_BACKEND
+        paths = [self.data_folder / 'results_all.csv'] + self._event_files()
+        tables = lambda: (self.results_data(), self.match_events())
+
+        if backend == 'sqlite':
+            try:
+                return derived_table(
+                    'sqlite_store', paths,
+                    lambda: SQLiteMatchStore.build(self.team.cache_path, _signature(paths), *tables()),
+                    self._cache()
+                )
+            except (sqlite3.Error, OSError):
+                pass
+        return derived_table('pandas_store', paths, lambda: PandasMatchStore(*tables()), self._cache())
+
+    def snapshot_results(self):
+        return load_table(self.data_folder / 'results_all.csv', _normalise_results, self._cache())
+
+    def snapshot_events(self):
+        if not self.has_event_table():
+            return self._legacy_event_tables()[1]
+        return load_table(self.data_folder / 'match_events.csv', _normalise_events, self._cache())
+
     def goals_data(self):
-        df = pd.read_csv(self.data_folder / 'goals_all.csv')
-        # Remove row where the first column has value 'TOTAL'
-        first_col = df.columns[0]
-        df = df[df[first_col] != 'TOTAL']
+        return self._wide_view('goals')
 
-        # Drop the column named 'TOTAL' if it exists
-        if 'TOTAL' in df.columns:
-            df = df.drop(columns=['TOTAL'])
+    def appearances_data(self):
+        return self._wide_view('appeared')
+
+    def legacy_goals_data(self):
+        return load_table(self.data_folder / 'goals_all.csv', _normalise_player_matrix, self._cache())
+
+    def legacy_appearances_data(self):
+        return load_table(self.data_folder / 'appearances_all.csv', _normalise_player_matrix, self._cache())
+
+    def _cache(self):
+        return _team_cache(self.team.slug)
+
+    def _event_files(self):
+        if not self.has_event_table():
+            files = [self.data_folder / 'goals_all.csv', self.data_folder / 'appearances_all.csv']
+        else:
+            files = [self.data_folder / 'players.csv', self.data_folder / 'match_events.csv']
+        return files + [self.ledger_path]
+
+    def _ledger_tables(self):
+        return derived_table(
+            'ledger_tables',
+            [self.data_folder / 'results_all.csv'] + self._event_files(),
+            lambda: apply_entries(self.snapshot_results(), self.snapshot_events(), read_entries(self.ledger_path)),
+            self._cache()
+        )
 
-        return df
+    def _legacy_event_tables(self):
+        return derived_table(
+            'legacy_events',
+            [self.data_folder / 'goals_all.csv', self.data_folder / 'appearances_all.csv'],
+            lambda: wide_to_long(self.legacy_goals_data(), self.legacy_appearances_data()),
+            self._cache()
+        )
 
-    def appearances_data(self):
-        df = pd.read_csv(self.data_folder / 'appearances_all.csv')
+    def _wide_view(self, value):
+        # Pre-migration trees still serve the wide CSVs as they are on disk
+        if not self.has_event_table():
+            return self.legacy_goals_data() if value == 'goals' else self.legacy_appearances_data()
+        return derived_table(
+            f'wide_{value}',
+            self._event_files(),
+            lambda: long_to_wide(self.players_data(), self.match_events(), value),
+            self._cache()
+        )
+
+
+# Per-team table caches, least recently used first; at most MAX_CACHED_TEAMS are kept
+_TEAM_CACHES = OrderedDict()
+
+
+def _team_cache(slug):
+    cache = _TEAM_CACHES.pop(slug, {})
+    _TEAM_CACHES[slug] = cache
+    while len(_TEAM_CACHES) > c.MAX_CACHED_TEAMS:
+        _TEAM_CACHES.popitem(last=False)
+    return cache
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def _normalise_results(df):
+    df.columns = df.columns.str.strip()
+    numeric_cols = [col for col in df.columns if col not in ('Season', 'Date', 'opponents', 'Result')]
+    df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce')
+    if not df['Gameweek'].isna().any():
+        df['Gameweek'] = df['Gameweek'].astype('int64')
+    return df
+
+
+def _normalise_player_matrix(df):
+    # Remove row where the first column has value 'TOTAL'
+    first_col = df.columns[0]
+    df = df[df[first_col] != 'TOTAL']
+
+    # Drop the column named 'TOTAL' if it exists
+    if 'TOTAL' in df.columns:
+        df = df.drop(columns=['TOTAL'])
+
+    gameweek_cols = df.columns[1:]
+    df[gameweek_cols] = df[gameweek_cols].apply(pd.to_numeric, errors='coerce')
+    return df.reset_index(drop=True)
 
-        # Remove row where the first column has value 'TOTAL'
-        first_col = df.columns[0]
-        df = df[df[first_col] != 'TOTAL']
 
-        # Drop the column named 'TOTAL' if it exists
-        if 'TOTAL' in df.columns:
-            df = df.drop(columns=['TOTAL'])
+def _normalise_players(df):
+    df['player_id'] = df['player_id'].astype('int64')
+    return df[PLAYER_COLUMNS]
+
+
+def _normalise_events(df):
+    df[EVENT_COLUMNS] = df[EVENT_COLUMNS].fillna(0).astype('int64')
+    return df[EVENT_COLUMNS]
+
+
+def _columnar_folder(path):
+    # Each team's data folder has its own cache folder next to the CSVs
+    return path.parent / c.CACHE_PATH.name
+
+
+def _read_columnar(path, signature):
+    cached_file = _columnar_folder(path) / f"{path.stem}-{signature}.parquet"
+    if not cached_file.exists():
+        return None
+    try:
+        return pd.read_parquet(cached_file)
+    except (ImportError, OSError, ValueError):
+        return None
+
+
+def _write_columnar(path, signature, df):
+    cache_folder = _columnar_folder(path)
+    try:
+        os.makedirs(cache_folder, exist_ok=True)
+        tmp_file = cache_folder / f".{path.stem}-{signature}.parquet.tmp"
+        df.to_parquet(tmp_file, index=False)
+        os.replace(tmp_file, cache_folder / f"{path.stem}-{signature}.parquet")
+    except (ImportError, OSError, ValueError):
+        # No Parquet engine or read-only filesystem: the CSV stays authoritative
+        return
+
+    # Remove copies made from older versions of the source file
+    for stale in cache_folder.glob(f"{path.stem}-*.parquet"):
+        if stale.name != f"{path.stem}-{signature}.parquet":
+            stale.unlink(missing_ok=True)
+
+
+def load_table(path, normalise, cache):
+    """Return a read-only view of the normalised table stored at ``path``."""
+    path = Path(path)
+    signature = _file_signature(path)
+    cached = cache.get(path)
+    cache_lookup('data.table', cached is not None and cached[0] == signature, table=path.name)
+
+    if cached is None or cached[0] != signature:
+        with timed('data.read_table', table=path.name):
+            df = _read_columnar(path, signature)
+            if df is None:
+                df = normalise(pd.read_csv(path))
+                _write_columnar(path, signature, df)
+        cache[path] = (signature, df)
+        cached = cache[path]
+
+    return _copy(cached[1])
+
+
+def derived_table(name, paths, build, cache):
+    """Memoise ``build()`` until any of the files it was built from changes.
+
+    ``build`` may return a DataFrame, a tuple of DataFrames or any other
+    read-only object. A missing file counts as its own version, so optional
+    inputs can be listed too.
+    """
+    signature = _signature(paths)
+    cached = cache.get(name)
+    cache_lookup('data.derived', cached is not None and cached[0] == signature, table=name)
+
+    if cached is None or cached[0] != signature:
+        with timed('data.derive', table=name):
+            cache[name] = (signature, build())
+        cached = cache[name]
+
+    return _shallow_copy(cached[1])
+
+
+def _signature(paths):
+    return tuple(_file_signature(path) if os.path.exists(path) else None for path in paths)
+
+
+def _shallow_copy(value):
+    if isinstance(value, tuple):
+        return tuple(_shallow_copy(item) for item in value)
+    return _copy(value) if isinstance(value, pd.DataFrame) else value
+
+
+def _copy(df):
+    # Under copy-on-write (switched on by the Streamlit app in Home.py) a shallow
+    # copy is safe to mutate without reaching the cache; otherwise hand out a deep one
+    return df.copy(deep=not pd.get_option('mode.copy_on_write'))
+
+
+def load_player_thumbnail(player_name, width, team=None):
+    """Thumbnail bytes for a player at a page's display width, or None without an image.
+
+    Served from the precomputed thumbnails (``make thumbnails``); falls back to
+    resizing the full-size image. Either way the bytes are cached in memory
+    per (player, width, file version).
+    """
+    from generate_thumbnails import thumbnail_path
+
+    team = get_team(team)
+    path = thumbnail_path(player_name, width, team)
+    if not path.exists():
+        path = team.images_path / f"{player_name}.png"
+        if not path.exists():
+            return None
+
+    stat = path.stat()
+    hits = _thumbnail_bytes.cache_info().hits
+    thumbnail = _thumbnail_bytes(str(path), width, stat.st_mtime_ns, stat.st_size)
+    cache_lookup('thumbnail', _thumbnail_bytes.cache_info().hits > hits)
+    return thumbnail
+
+
+@lru_cache(maxsize=256)
+def _thumbnail_bytes(path, width, mtime_ns, size):
+    if Path(path).parent.name == c.THUMBNAILS_PATH.name:
+        return Path(path).read_bytes()
+
+    from generate_thumbnails import make_thumbnail
+
+    buffer = io.BytesIO()
+    make_thumbnail(path, width).save(buffer, format='PNG')
+    return buffer.getvalue()
+
 
-        return df
-    
 class CollectGameweeks:
-    def __init__(self, season):
+    def __init__(self, season, team=None):
         self.season = season
-        loader = DataLoader()
-        self.results = loader.results_data()  # Store results for reuse
+        self.store = DataLoader(team).query()
+
     def collect(self):
-        df = self.results
+        # Indexed season lookup; "All seasons" returns every gameweek
+        return self.store.season_gameweeks(self.season)
 
-        if self.season != "All seasons":
-            df = df[df["Season"] == self.season]
 
-        # Drop NA, get unique values, sort
-        gameweeks = sorted(df["Game week"].dropna().unique().tolist())
-        return gameweeks
-    
 class FilterGameweeks:
     def __init__(self, gameweeks):
         self.gameweeks = gameweeks  # e.g., [1, 2, 3]
 
     def results_filter(self, results_df):
-        return results_df[results_df["Game week"].isin(self.gameweeks)]
+        return results_df[results_df["Gameweek"].isin(self.gameweeks)]
+
+    def events_filter(self, events_df):
+        return events_df[events_df["gameweek_id"].isin(self.gameweeks)]
 
     def appearances_filter(self, appearances_df):
-        cols_to_keep = ["Player"] + [f"Gameweek {gw}" for gw in self.gameweeks]
+        cols_to_keep = ["Player"] + [gameweek_column(gw) for gw in self.gameweeks]
         return appearances_df[cols_to_keep]
 
     def goals_filter(self, goals_df):
-        cols_to_keep = ["Player"] + [f"Gameweek {gw}" for gw in self.gameweeks]
+        cols_to_keep = ["Player"] + [gameweek_column(gw) for gw in self.gameweeks]
         return goals_df[cols_to_keep]
-
-
-
-
-        